@@ -1,25 +1,335 @@
 """ReAct Agent for autonomous customer support."""
 
 import re
-import json
 import time
-from typing import List, Any, Optional, Dict
+import uuid
+import asyncio
+import threading
+from collections import deque, Counter, OrderedDict
+from typing import List, Any, Optional, Dict, Callable, Iterable, Awaitable
+
+import orjson
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 
 from app.services.llm_engine import get_llm
-from app.services.database import get_db_connection
-from app.tools.db_tools import db_tools
-from app.tools.rag_tools import rag_tools
-from app.tools.stripe_tools import stripe_tools
-from app.tools.order_management_tools import order_management_tools
-from app.tools.refund_workflow_tools import refund_workflow_tools
-from app.tools.replacement_tools import request_product_replacement
-from app.services.escalation import escalation_tools, EscalationManager
+from app.services.database import get_thread_connection
+from app.tools.registry import TOOL_DESCRIPTIONS, tool_map
+from app.services.escalation import EscalationManager, ESCALATION_KEYWORDS, COMPLEX_KEYWORDS
 from app.services.memory import ConversationMemory
+from app.services.cache import get_semantic_cache
+from app.services.intent_classifier import get_intent_classifier
+from app.utils.config import settings
 from app.utils.logging_config import logger, log_tool_execution, log_agent_request, log_escalation
 
 
-# Agent system prompt
-AGENT_SYSTEM_PROMPT = """You are a professional customer support agent working for a company. Your goal is to help customers with genuine care and attention.
+# Precompiled patterns used on every request
+_ACTION_RE = re.compile(r'\{[^}]*"action"[^}]*\}')
+_ORDER_RE = re.compile(r'ord\d+', re.IGNORECASE)
+_EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+_FINAL_ANSWER_RE = re.compile(r'FINAL ANSWER:', re.IGNORECASE)
+
+
+def _find_email(text: str) -> Optional[re.Match]:
+    """Search for an email address, skipping the regex when there is no '@'."""
+    return _EMAIL_RE.search(text) if "@" in text else None
+
+# Technical phrases stripped from responses by _clean_response, fused into a
+# single alternation so each response is scanned once
+_TECHNICAL_PHRASES = [
+    r"I'll use the \w+ tool",
+    r"using the \w+ tool",
+    r"I will use the \w+ tool",
+    r"Let me use the \w+ tool",
+    r"I'll search the \w+ database",
+    r"I'll query the \w+",
+    r"Here's my next step:",
+    r"Here's my request:",
+    r"Here is my action:",
+    r"Here's the JSON object:",
+    r"\{\"action\":[^}]+\}",
+    r"semantic_search_faq",
+    r"fetch_order",
+    r"fetch_customer",
+    r"tool to retrieve",
+    r"database operations",
+    r"Please let me know if this is acceptable",
+    r"if you'd like me to proceed",
+]
+_CLEAN_RE = re.compile("|".join(f"(?:{p})" for p in _TECHNICAL_PHRASES), re.IGNORECASE)
+_WS_RE = re.compile(r'\n\s*\n')
+
+# Intent keywords matched against the lowercased query
+_INTENT_KEYWORDS = {
+    "refund_action": ("refund", "proceed", "process"),
+    "order": ("order", "ord", "where is my", "track"),
+    "replacement": ("replacement", "replace", "defective", "wrong item", "damaged", "quality issue"),
+    "reason_wrong_item": ("wrong item", "wrong product"),
+    "reason_damaged": ("damaged", "broken"),
+    "reason_defective": ("quality", "defective"),
+    "refund_policy": ("refund", "return", "money back"),
+    "cancel": ("cancel",),
+}
+
+
+def _build_keyword_intents() -> Dict[str, frozenset]:
+    """Map each keyword to its intents, folding in intents of keywords it contains."""
+    keyword_intents: Dict[str, set] = {}
+    for intent, keywords in _INTENT_KEYWORDS.items():
+        for keyword in keywords:
+            keyword_intents.setdefault(keyword, set()).add(intent)
+    # The scan below is non-overlapping ("order" consumes "ord"), so a keyword
+    # must also carry the intents of every keyword nested inside it
+    for keyword, intents in keyword_intents.items():
+        for other, other_intents in keyword_intents.items():
+            if other != keyword and other in keyword:
+                intents |= other_intents
+    return {keyword: frozenset(intents) for keyword, intents in keyword_intents.items()}
+
+
+# Keywords by how often they appear in stored customer messages, most common
+# first; the alternation tries them in this order at each position
+_KEYWORD_FREQUENCY = (
+    "ord", "refund", "order", "replacement", "replace", "damaged", "where is my", "proceed",
+)
+
+
+def _keyword_scan_order(keywords) -> List[str]:
+    """
+    Order keywords for the alternation: most frequent first, but never ahead
+    of a longer keyword that contains it ("order" must be tried before "ord").
+    """
+    rank = {keyword: _KEYWORD_FREQUENCY.index(keyword) if keyword in _KEYWORD_FREQUENCY
+            else len(_KEYWORD_FREQUENCY) for keyword in keywords}
+    effective = {
+        keyword: min(rank[other] for other in keywords if other in keyword)
+        for keyword in keywords
+    }
+    return sorted(keywords, key=lambda keyword: (effective[keyword], -len(keyword)))
+
+
+_KEYWORD_INTENTS = _build_keyword_intents()
+_INTENT_RE = re.compile("|".join(
+    re.escape(keyword) for keyword in _keyword_scan_order(list(_KEYWORD_INTENTS))
+), re.IGNORECASE)
+
+
+def _detect_intents(query: str) -> frozenset:
+    """
+    Return every intent whose keywords appear in the query, in one scan.
+    
+    Matching is case-insensitive, so only the matched keywords are lowercased
+    rather than the whole query.
+    """
+    return frozenset(
+        intent
+        for keyword in _INTENT_RE.findall(query)
+        for intent in _KEYWORD_INTENTS.get(keyword.lower(), ())
+    )
+
+# Cheap check for any escalation trigger before running the full escalation rules
+_ESCALATION_PREFILTER_RE = re.compile("|".join(
+    re.escape(keyword) for keyword in ESCALATION_KEYWORDS + COMPLEX_KEYWORDS
+), re.IGNORECASE)
+
+# DIRECT path: messages answered from a template without calling the LLM
+_GREETING_RE = re.compile(r'(hi|hello|hey)( there)?[.!?]*', re.IGNORECASE)
+_GREETING_RESPONSE = "Hello! Thanks for reaching out. How can I help you today? I can check on an order, help with a refund or replacement, or answer questions about our policies."
+
+# Words allowed around an order ID in a plain "where is my order" message
+_WORD_RE = re.compile(r"[a-z']+")
+_ORDER_STATUS_WORDS = frozenset({
+    "a", "about", "an", "any", "can", "check", "could", "for", "hello", "hey", "hi", "how",
+    "i", "id", "is", "it", "me", "my", "number", "of", "on", "order", "please", "s", "status",
+    "tell", "the", "there", "track", "tracking", "update", "what", "what's", "whats", "where",
+    "where's", "wheres", "you",
+})
+
+_ORDER_STATUS_TEMPLATES = {
+    "pending": "I can see your order {order_id} for the {product_name}, placed on {order_date}. It's confirmed and waiting to be shipped - you'll receive tracking details as soon as it's on its way.",
+    "processing": "I can see your order {order_id} for the {product_name}, placed on {order_date}. It's currently being prepared, and tracking information should be available within 24 hours.",
+    "shipped": "Good news! Your order {order_id} for the {product_name} has shipped and is on its way to you.",
+    "delivered": "I can see your order {order_id} for the {product_name} has been delivered. If anything isn't right with it, just let me know and I'll be happy to help.",
+    "cancelled": "I can see your order {order_id} for the {product_name} was cancelled. If that's unexpected, let me know and I'll look into it for you.",
+    "refunded": "I can see your order {order_id} for the {product_name} has been refunded, and the payment was returned to your original payment method.",
+}
+_ORDER_STATUS_CLOSING = "\n\nIs there anything else I can help you with?"
+
+
+def _order_status_id(query: str) -> Optional[str]:
+    """Return the order ID if the query only asks about that order's status."""
+    order_match = _ORDER_RE.search(query)
+    if not order_match or len(_ORDER_RE.findall(query)) > 1:
+        return None
+    words = _WORD_RE.findall(_ORDER_RE.sub(" ", query.lower()))
+    if not all(word in _ORDER_STATUS_WORDS for word in words):
+        return None
+    return order_match.group().upper()
+
+
+# How each request was answered, to tune the DIRECT rules and caches
+_ROUTE_COUNTS: Counter = Counter()
+_ROUTE_COUNTS_LOCK = threading.Lock()
+
+
+def _count_route(route: str):
+    """Count the path that answered a request, logging the split every 100 requests."""
+    with _ROUTE_COUNTS_LOCK:
+        _ROUTE_COUNTS[route] += 1
+        total = sum(_ROUTE_COUNTS.values())
+        if total % 100:
+            return
+        routes = _ROUTE_COUNTS.most_common()
+    split = ", ".join(f"{name}={count / total:.0%}" for name, count in routes)
+    logger.info(f"Request routes over {total} requests: {split}")
+
+# Intents whose answers depend on live account data or trigger actions, so
+# they are never served from or stored in the semantic cache
+_UNCACHEABLE_INTENTS = frozenset({"refund_action", "replacement", "cancel"})
+
+# Intents the embedding classifier may route to. Its matches are fuzzy, so
+# it only picks read-only paths; intents that file tickets or change orders
+# (replacement, cancel) need an explicit keyword or the LLM's decision.
+_CLASSIFIER_INTENTS = frozenset({"order", "refund_policy"})
+
+# Shorter messages ("yes", "ok thanks") only make sense in their conversation
+_MIN_CACHEABLE_WORDS = 3
+
+
+def _is_cacheable(query: str, intents: frozenset) -> bool:
+    """Whether a query's answer is generic enough to share across sessions."""
+    return (
+        settings.semantic_cache_enabled
+        and not intents & _UNCACHEABLE_INTENTS
+        and len(query.split()) >= _MIN_CACHEABLE_WORDS
+        and not _ORDER_RE.search(query)
+        and not _find_email(query)
+    )
+
+# Customer email lookup for replacement requests without an email in the conversation
+_EMAIL_BY_ORDER_SQL = """
+    SELECT c.email
+    FROM orders o
+    LEFT JOIN customers c ON o.customer_id = c.customer_id
+    WHERE o.order_id = ?
+"""
+
+# Most recent tool rounds (action + observations) re-sent to the LLM on each
+# reasoning iteration
+_MAX_OBSERVATIONS = 4
+
+# Longest tool result kept in the prompt and in tool_results
+MAX_TOOL_RESULT_CHARS = 1500
+
+
+def _truncate_result(result: str) -> str:
+    """Cap a tool result at MAX_TOOL_RESULT_CHARS, marking the cut."""
+    if len(result) <= MAX_TOOL_RESULT_CHARS:
+        return result
+    return result[:MAX_TOOL_RESULT_CHARS] + "\n...[truncated]"
+
+
+# Per-tool time limits in seconds; tools not listed get DEFAULT_TOOL_TIMEOUT
+TOOL_TIMEOUTS = {
+    "fetch_customer": 2.0,
+    "fetch_order": 2.0,
+    "search_orders_by_customer": 2.0,
+    "track_shipment": 2.0,
+    "check_ticket_status": 2.0,
+    "semantic_search_faq": 3.0,
+    "search_product_documentation": 3.0,
+    "initiate_refund": 8.0,
+    "request_product_replacement": 8.0,
+    "process_refund_for_order": 10.0,
+}
+DEFAULT_TOOL_TIMEOUT = 5.0
+
+# Read-only tools that are safe to run again after a timeout
+_RETRYABLE_TOOLS = frozenset({
+    "fetch_customer", "fetch_order", "search_orders_by_customer", "track_shipment",
+    "check_ticket_status", "semantic_search_faq", "search_product_documentation",
+    "check_payment_status", "check_refund_eligibility",
+})
+_TOOL_RETRY_MAX = 1
+
+# Template placeholders ("<order_id>", "[email]", "{result}") in an action input
+# mean it is waiting on the result of another action
+_PLACEHOLDER_RE = re.compile(r'<[^>]*>|\[[^\]]*\]|\{[^}]*\}')
+
+
+def _load_action(json_match: re.Match) -> Optional[Dict[str, Any]]:
+    """Decode an action JSON match, or None if it isn't a valid action."""
+    try:
+        action_dict = orjson.loads(json_match.group())
+    except Exception:
+        return None
+    return action_dict if isinstance(action_dict, dict) and "action" in action_dict else None
+
+
+def _independent_actions(actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Return the leading actions that can run concurrently.
+    
+    Stops at the first action whose input references an earlier action in the
+    batch, either by tool name or through a placeholder; the LLM re-issues it
+    with real data once the earlier results are in.
+    """
+    batch = []
+    for action in actions:
+        tool_input = str(action.get("action_input", ""))
+        if batch and (_PLACEHOLDER_RE.search(tool_input)
+                      or any(prev["action"] in tool_input for prev in batch)):
+            break
+        batch.append(action)
+    return batch
+
+
+# Streamed answer text stays this many characters behind the cleaned answer,
+# so a technical phrase still being generated can be removed before it is sent
+_STREAM_HOLDBACK = 64
+
+
+class _AnswerStream:
+    """
+    Streams a final answer to an on_token callback as it is generated.
+    
+    The client sees exactly the text the agent returns: each call re-cleans
+    the answer so far with `clean` and sends only the part that can no
+    longer change, i.e. up to _STREAM_HOLDBACK characters from the end or
+    an unclosed "{". An answer that starts with "{" is never sent, as the
+    agent discards it. finish() sends the rest once the answer is accepted.
+    """
+    
+    def __init__(self, on_token: Callable[[str], None], clean: Callable[[str], str]):
+        self.on_token = on_token
+        self.clean = clean
+        self.answer = ""
+        self.sent = ""
+    
+    def feed(self, text: str) -> None:
+        """Add newly generated answer text, sending whatever is now stable."""
+        self.answer += text
+        if self.answer.lstrip().startswith("{"):
+            return
+        cleaned = self.clean(self.answer)
+        stable = len(cleaned) - _STREAM_HOLDBACK
+        unclosed = cleaned.rfind("{")
+        if unclosed > cleaned.rfind("}"):
+            stable = min(stable, unclosed)
+        if stable > len(self.sent) and cleaned.startswith(self.sent):
+            self.on_token(cleaned[len(self.sent):stable])
+            self.sent = cleaned[:stable]
+    
+    def finish(self, final_answer: str) -> None:
+        """Send the rest of the accepted answer."""
+        if final_answer.startswith(self.sent) and len(final_answer) > len(self.sent):
+            self.on_token(final_answer[len(self.sent):])
+            self.sent = final_answer
+
+
+# Agent system prompt. It has no placeholders, so it is byte-identical across
+# requests and sessions and providers can cache it as a prompt prefix. The tool
+# list follows in its own system message; per-request context goes in user messages.
+STATIC_SYSTEM_PROMPT = """You are a professional customer support agent working for a company. Your goal is to help customers with genuine care and attention.
 
 **YOUR PERSONALITY:**
 - Professional but friendly - like talking to a helpful store employee
@@ -29,8 +339,6 @@ AGENT_SYSTEM_PROMPT = """You are a professional customer support agent working f
 - Use natural transitions: "Let me look into that for you", "Give me just a moment", "I can definitely help with that"
 - NEVER mention internal systems, tools, databases, or technical processes
 
-{conversation_context}
-
 **CONVERSATION STYLE:**
 1. **Acknowledge & Empathize** - Show you understand their concern
 2. **Explain Your Actions** - "Let me check on that order for you", "I'll look into your refund options"
@@ -45,16 +353,14 @@ AGENT_SYSTEM_PROMPT = """You are a professional customer support agent working f
 4. **USE TOOL RESULTS NATURALLY** - Weave data into conversation, don't list it
 5. **NO PLACEHOLDERS** - Never say "[insert status here]" - always use real data
 
-{tool_descriptions}
-
 **WHEN TO USE TOOLS (Silently - customer never sees this):**
 Reply with ONLY JSON when you need data:
 
 Examples:
-{{"action": "fetch_order", "action_input": "ORD0001"}}
-{{"action": "check_refund_eligibility", "action_input": "ORD0001"}}
-{{"action": "process_refund_for_order", "action_input": "ORD0001|user@example.com"}}
-{{"action": "create_support_ticket", "action_input": "Issue description|ORD0001|user@example.com"}}
+{"action": "fetch_order", "action_input": "ORD0001"}
+{"action": "check_refund_eligibility", "action_input": "ORD0001"}
+{"action": "process_refund_for_order", "action_input": "ORD0001|user@example.com"}
+{"action": "create_support_ticket", "action_input": "Issue description|ORD0001|user@example.com"}
 
 For tools needing multiple values, separate with | character.
 Extract order_id and email from conversation history!
@@ -95,7 +401,7 @@ STEP 3A: If Customer Says YES
 - Ask ONCE: "I'll need your email to send confirmation."
 - WAIT for email response
 - ⚠️ CRITICAL: Once you have email, STOP TALKING and IMMEDIATELY execute:
-  {{"action": "process_refund_for_order", "action_input": "ORD0004|email@example.com"}}
+  {"action": "process_refund_for_order", "action_input": "ORD0004|email@example.com"}
 - DO NOT ask for confirmation again
 - DO NOT say "I'll initiate" - ACTUALLY DO IT
 - AFTER tool executes, confirm: "Perfect! Refund processed and confirmation sent to [email]"
@@ -140,6 +446,16 @@ High-value refunds >₹10k/$120: "This refund requires manager approval. I've cr
 Remember: Be HUMAN, CARING, and CONVERSATIONAL - like a real customer service rep!"""
 
 
+# Closes the opening user message of every reasoning loop
+_REASONING_INSTRUCTIONS = """
+
+**Instructions:**
+- If you have tool results above, you MUST use the actual data in your response
+- If you need more data, call a tool with JSON: {"action": "tool_name", "action_input": "value"}
+- If you have enough data, respond with "FINAL ANSWER:" followed by your complete response using the ACTUAL data from tool results
+- NEVER use placeholders like "[insert X here]" or generic responses - always use the specific data provided"""
+
+
 class CustomerSupportAgent:
     """
     Simple autonomous customer support agent.
@@ -159,18 +475,35 @@ class CustomerSupportAgent:
             model_name: Optional LLM model name override
             session_id: Optional session ID for conversation memory
         """
-        self.llm = get_llm(model_name=model_name)
+        self.model_name = model_name or settings.model_name
+        self.llm = get_llm(model_name=self.model_name)
         self.tools = self._register_tools()
-        self.session_id = session_id or f"session_{int(time.time())}"
+        self.session_id = session_id or new_session_id()
         self.memory = ConversationMemory(self.session_id)
-        self.tool_results = []  # Track tool results for escalation detection
         
-        # Create a simple tool mapper
-        self.tool_map = {tool.name: tool for tool in self.tools}
+        # Tools are imported on first lookup
+        self.tool_map = tool_map
+        
+        # Tool list is fixed after registration, so describe it once; together
+        # with the static prompt it forms the prefix of every LLM call
+        self._tool_descriptions = "\n".join(
+            f"- {name}: {TOOL_DESCRIPTIONS[name]}" for name in self.tools
+        )
+        self._prompt_prefix = [
+            SystemMessage(content=STATIC_SYSTEM_PROMPT),
+            SystemMessage(content=f"**AVAILABLE TOOLS:**\n{self._tool_descriptions}"),
+        ]
+        
+        # Intents that resolve to a fixed tool call once their slots are filled,
+        # skipping the FAQ search and the LLM reasoning loop entirely
+        self._intent_plans: Dict[str, Callable[[str, dict, List[str]], Awaitable[str]]] = {
+            "refund_complete": self._plan_refund,
+            "replacement_complete": self._plan_replacement,
+        }
         
         logger.info(f"Agent initialized for session {self.session_id}")
     
-    def _register_tools(self) -> List:
+    def _register_tools(self) -> List[str]:
         """
         Register all available tools for the agent.
         
@@ -181,82 +514,29 @@ class CustomerSupportAgent:
         - Stripe operations (refunds with limits, payment status)
         - Escalation tools (create_ticket, check_ticket_status)
         
+        Tool modules aren't imported here; see app.tools.registry.
+        
         Returns:
-            List: All registered tools
+            List[str]: Names of all registered tools
         """
-        # Combine all tool lists
-        all_tools = []
-        
-        # Add database tools
-        all_tools.extend(db_tools)
-        
-        # Add order management tools
-        all_tools.extend(order_management_tools)
-        
-        # Add RAG tools
-        all_tools.extend(rag_tools)
-        
-        # Add Stripe tools (legacy - for checking payment status)
-        all_tools.extend(stripe_tools)
-        
-        # Add refund workflow tools (complete refund handling)
-        all_tools.extend(refund_workflow_tools)
-        
-        # Add replacement tools
-        all_tools.append(request_product_replacement)
-        
-        # Add escalation tools
-        all_tools.extend(escalation_tools)
+        all_tools = list(TOOL_DESCRIPTIONS)
         
         logger.info(f"Registered {len(all_tools)} tools for the agent")
-        print(f"🛠️  Registered {len(all_tools)} tools for the agent")
         return all_tools
     
-    def _parse_action(self, text: str) -> Optional[Dict[str, str]]:
-        """Parse action JSON from LLM response."""
-        try:
-            # Try to find JSON object in the text
-            json_match = re.search(r'\{[^}]*"action"[^}]*\}', text)
-            if json_match:
-                action_dict = json.loads(json_match.group())
-                return action_dict
-            return None
-        except Exception:
-            return None
+    def _parse_actions(self, text: str) -> List[Dict[str, str]]:
+        """Parse every action JSON object from an LLM response, in order."""
+        return [action for action in map(_load_action, _ACTION_RE.finditer(text)) if action]
     
     def _clean_response(self, response: str) -> str:
         """
         Clean technical jargon from LLM response to make it human-like.
         Remove any mentions of tools, actions, or internal processes.
         """
-        # Remove technical phrases
-        technical_phrases = [
-            r"I'll use the \w+ tool",
-            r"using the \w+ tool",
-            r"I will use the \w+ tool",
-            r"Let me use the \w+ tool",
-            r"I'll search the \w+ database",
-            r"I'll query the \w+",
-            r"Here's my next step:",
-            r"Here's my request:",
-            r"Here is my action:",
-            r"Here's the JSON object:",
-            r"\{\"action\":[^}]+\}",
-            r"semantic_search_faq",
-            r"fetch_order",
-            r"fetch_customer",
-            r"tool to retrieve",
-            r"database operations",
-            r"Please let me know if this is acceptable",
-            r"if you'd like me to proceed",
-        ]
-        
-        cleaned = response
-        for phrase in technical_phrases:
-            cleaned = re.sub(phrase, "", cleaned, flags=re.IGNORECASE)
+        cleaned = _CLEAN_RE.sub("", response)
         
         # Clean up extra whitespace and newlines
-        cleaned = re.sub(r'\n\s*\n', '\n\n', cleaned)
+        cleaned = _WS_RE.sub('\n\n', cleaned)
         cleaned = cleaned.strip()
         
         # If response is too short or empty after cleaning, return original
@@ -265,22 +545,98 @@ class CustomerSupportAgent:
         
         return cleaned
     
-    def _execute_tool(self, tool_name: str, tool_input: str) -> str:
-        """Execute a tool and return the result with logging."""
+    async def _ainvoke_llm(
+        self,
+        messages: List[BaseMessage],
+        stop_on_action: bool = True,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_action: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> str:
+        """
+        Stream an LLM response to the static prompt prefix followed by the per-request messages.
+        
+        Keeping the system messages byte-identical across calls lets providers
+        with prompt caching reuse the long static prefix.
+        
+        Args:
+            messages: Per-request messages, appended after the prompt prefix
+            stop_on_action: Stop generating once the run of action JSON blocks ends
+            on_token: Optional callback receiving final-answer text as it is
+                generated; not called if the response also contains actions
+            on_action: Optional callback receiving each action as soon as its JSON
+                closes, while the rest of the response is still being generated
+            
+        Returns:
+            str: The (possibly truncated) response text
+        """
+        if not stop_on_action and on_token is None:
+            # Nothing to stream or cut short, so let the call batch with others
+            response = await self.llm.ainvoke([*self._prompt_prefix, *messages])
+            return response.content if hasattr(response, 'content') else str(response)
+        
+        buffer = ""
+        in_final_answer = False
+        stream_answer = False
+        actions_end = 0  # End of the last complete action JSON in buffer
+        async for chunk in self.llm.astream([*self._prompt_prefix, *messages]):
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if not text:
+                continue
+            buffer += text
+            
+            if in_final_answer:
+                if stream_answer:
+                    on_token(text)
+                continue
+            
+            # Only the newly arrived text (plus room for a split marker) needs checking
+            marker = _FINAL_ANSWER_RE.search(buffer, max(0, len(buffer) - len(text) - len("FINAL ANSWER:")))
+            if marker:
+                in_final_answer = True
+                # An answer given alongside tool calls is discarded, so don't send it
+                stream_answer = on_token is not None and not actions_end
+                answer_so_far = buffer[marker.end():]
+                if stream_answer and answer_so_far:
+                    on_token(answer_so_far)
+                continue
+            
+            if stop_on_action:
+                if "}" in text:
+                    for action_match in _ACTION_RE.finditer(buffer, actions_end):
+                        actions_end = action_match.end()
+                        action = _load_action(action_match)
+                        if on_action and action:
+                            on_action(action)
+                if actions_end:
+                    # Keep reading while further actions follow; anything else
+                    # means the tool calls are complete, so don't pay for the rest
+                    tail = buffer[actions_end:].lstrip()
+                    if tail and (not tail.startswith("{") or "}" in tail):
+                        break
+        
+        return buffer
+    
+    def _execute_tool(self, tool_name: str, tool_input: str, tool_results: Optional[List[str]] = None) -> str:
+        """
+        Execute a tool and return the result with logging.
+        
+        Args:
+            tool_name: Name of the registered tool
+            tool_input: Raw action input from the LLM or an intent plan
+            tool_results: Optional per-request list collecting results for escalation detection
+        """
         start_time = time.time()
         try:
-            if tool_name not in self.tool_map:
-                error_msg = f"Error: Tool '{tool_name}' not found. Available tools: {', '.join(self.tool_map.keys())}"
+            if tool_name not in TOOL_DESCRIPTIONS:
+                error_msg = f"Error: Tool '{tool_name}' not found. Available tools: {', '.join(TOOL_DESCRIPTIONS)}"
                 logger.error(f"Tool not found: {tool_name}")
                 return error_msg
             
             tool = self.tool_map[tool_name]
-            print(f"🔧 Executing tool: {tool_name} with input: {tool_input}")
+            logger.debug(f"🔧 Executing tool: {tool_name} with input: {tool_input}")
             logger.info(f"Executing tool: {tool_name}", extra={"tool_name": tool_name, "session_id": self.session_id})
             
             # Handle different input formats
-            import json
-            
             # Special handling for multi-parameter tools
             if tool_name == "process_refund_for_order" and "|" in tool_input:
                 # Format: "order_id|customer_email" or "order_id|customer_email|reason"
@@ -301,19 +657,24 @@ class CustomerSupportAgent:
             else:
                 # Try JSON first
                 try:
-                    parsed_input = json.loads(tool_input)
+                    parsed_input = orjson.loads(tool_input)
                     if isinstance(parsed_input, dict):
                         result = tool.func(**parsed_input)
                     else:
                         result = tool.func(tool_input)
-                except (json.JSONDecodeError, TypeError):
+                except (orjson.JSONDecodeError, TypeError):
                     # Single string parameter
                     result = tool.func(tool_input)
             
-            result_str = str(result)
+            # Structured results go into the prompt as JSON rather than a Python repr
+            if isinstance(result, (dict, list)):
+                result_str = orjson.dumps(result, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+            else:
+                result_str = str(result)
             
             # Track tool results for escalation detection
-            self.tool_results.append(result_str)
+            if tool_results is not None:
+                tool_results.append(_truncate_result(result_str))
             
             # Log execution
             execution_time = time.time() - start_time
@@ -325,13 +686,190 @@ class CustomerSupportAgent:
             execution_time = time.time() - start_time
             error_msg = f"Error executing tool {tool_name}: {str(e)}"
             logger.error(error_msg, extra={"tool_name": tool_name, "session_id": self.session_id, "execution_time": execution_time})
-            self.tool_results.append(error_msg)
+            if tool_results is not None:
+                tool_results.append(error_msg)
             return error_msg
     
-    def run(self, user_input: str, max_iterations: int = 5) -> str:
+    async def _aexecute_tool(self, tool_name: str, tool_input: str, tool_results: Optional[List[str]] = None) -> str:
+        """
+        Execute a tool in a worker thread so the event loop stays free.
+        
+        Each attempt is bounded by the tool's entry in TOOL_TIMEOUTS. Read-only
+        tools are retried after a timeout; tools with side effects are not, as
+        the timed-out call may still complete.
+        """
+        timeout = TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+        retryable = tool_name in _RETRYABLE_TOOLS
+        for attempt in range(1 + (_TOOL_RETRY_MAX if retryable else 0)):
+            try:
+                return await asyncio.wait_for(
+                    asyncio.to_thread(self._execute_tool, tool_name, tool_input, tool_results),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Tool {tool_name} timed out after {timeout}s (attempt {attempt + 1})",
+                    extra={"tool_name": tool_name, "session_id": self.session_id}
+                )
+        
+        # Structured so the LLM can decide what to tell the customer
+        if retryable:
+            error_msg = f"Error: {tool_name} timed out after {timeout:g}s (timeout, retryable). The service may be temporarily slow; you may try again."
+        else:
+            error_msg = f"Error: {tool_name} timed out after {timeout:g}s (timeout, not retryable). It may still complete, so do not repeat it; offer a support ticket instead."
+        if tool_results is not None:
+            tool_results.append(error_msg)
+        return error_msg
+    
+    async def _plan_refund(self, user_input: str, slots: dict, tool_results: List[str]) -> str:
+        """Process a refund directly once order ID and email are known."""
+        logger.debug(f"⚡ AUTO-EXECUTING REFUND: {slots['order_id']} | {slots['email']}")
+        return await self._aexecute_tool(
+            "process_refund_for_order", f"{slots['order_id']}|{slots['email']}", tool_results
+        )
+    
+    async def _plan_replacement(self, user_input: str, slots: dict, tool_results: List[str]) -> str:
+        """Submit a replacement request directly once order ID, email and reason are known."""
+        logger.debug(f"⚡ EXECUTING REPLACEMENT: {slots['order_id']} | {slots['email']} | {slots['reason']}")
+        return await self._aexecute_tool(
+            "request_product_replacement",
+            f"{slots['order_id']}|{slots['email']}|{slots['reason']}",
+            tool_results
+        )
+    
+    async def _run_plan(
+        self,
+        intent: str,
+        user_input: str,
+        slots: dict,
+        tool_results: List[str],
+        start_time: float
+    ) -> str:
+        """
+        Execute a precompiled intent plan and record the result.
+        
+        Args:
+            intent: Key into self._intent_plans
+            user_input: The customer's message
+            slots: Extracted parameters required by the plan
+            tool_results: Per-request list collecting tool results
+            start_time: Request start time for logging
+            
+        Returns:
+            str: The plan's response
+        """
+        result = await self._intent_plans[intent](user_input, slots, tool_results)
+        _count_route(intent)
+        
+        # User message was already saved at the start of arun()
+        self.memory.add_message("assistant", result)
+        log_agent_request(self.session_id, user_input, result, time.time() - start_time)
+        
+        logger.debug(f"✅ {intent} plan complete, returning result")
+        return result
+    
+    async def _direct_response(self, user_input: str, intents: frozenset) -> Optional[tuple]:
+        """
+        Answer messages that need no reasoning from a template.
+        
+        Handles greetings and plain order-status lookups; anything else, or a
+        lookup that fails, falls through to the LLM.
+        
+        Args:
+            user_input: The customer's message
+            intents: Intents detected in the message
+            
+        Returns:
+            Optional[tuple]: (route name, response), or None to use the LLM
+        """
+        if not intents and _GREETING_RE.fullmatch(user_input.strip()):
+            return "direct_greeting", _GREETING_RESPONSE
+        
+        if intents - {"order"}:
+            return None
+        order_id = _order_status_id(user_input)
+        if not order_id:
+            return None
+        
+        try:
+            order = await asyncio.wait_for(
+                asyncio.to_thread(self.tool_map["fetch_order"].func, order_id),
+                timeout=TOOL_TIMEOUTS["fetch_order"]
+            )
+        except Exception as e:
+            logger.warning(f"Direct order lookup failed: {e}", extra={"session_id": self.session_id})
+            return None
+        
+        template = _ORDER_STATUS_TEMPLATES.get(order.get("order_status"))
+        if order.get("status") != "success" or template is None:
+            return None
+        
+        return "direct_order_status", template.format(
+            order_id=order["order_id"],
+            product_name=order["product_name"],
+            order_date=str(order["order_date"])[:10],
+        ) + _ORDER_STATUS_CLOSING
+    
+    def _extract_slots(self, sources: Iterable[str]) -> Dict[str, str]:
+        """
+        Find the first order ID and email across sources, in order.
+        
+        Each source is scanned at most once per slot, stopping as soon as
+        both slots are filled.
+        
+        Args:
+            sources: Texts to search, highest priority first
+            
+        Returns:
+            Dict with "order_id" (uppercased) and/or "email" when found
+        """
+        slots: Dict[str, str] = {}
+        for text in sources:
+            if "order_id" not in slots:
+                order_match = _ORDER_RE.search(text)
+                if order_match:
+                    slots["order_id"] = order_match.group().upper()
+            if "email" not in slots:
+                email_match = _find_email(text)
+                if email_match:
+                    slots["email"] = email_match.group()
+            if len(slots) == 2:
+                break
+        return slots
+    
+    def _fetch_email_for_order(self, order_id: str) -> Optional[str]:
+        """Look up the customer email on file for an order."""
+        row = get_thread_connection().execute(_EMAIL_BY_ORDER_SQL, (order_id,)).fetchone()
+        return row[0] if row and row[0] else None
+    
+    def run(
+        self,
+        user_input: str,
+        max_iterations: int = 5,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Run the agent synchronously, for scripts and callers without an event loop.
+        
+        See arun() for details. Async callers (e.g. FastAPI routes) should
+        await arun() directly.
+        """
+        return asyncio.run(self.arun(user_input, max_iterations=max_iterations, on_token=on_token))
+    
+    async def arun(
+        self,
+        user_input: str,
+        max_iterations: int = 5,
+        on_token: Optional[Callable[[str], None]] = None,
+        batched: bool = False
+    ) -> str:
         """
         Run the agent with ReAct-style reasoning and tool calling.
         
+        LLM calls are awaited and blocking work (tools, memory reads and
+        writes) runs in worker threads, so concurrent chats overlap instead
+        of queueing behind each other on the event loop.
+        
         The agent will:
         1. Check conversation history for context
         2. Check if query should be escalated to human
@@ -341,25 +879,75 @@ class CustomerSupportAgent:
         6. Combine tool results with LLM knowledge
         7. Provide comprehensive final answer or escalate
         
+        The whole run is bounded by settings.agent_timeout_s; a run that
+        takes longer is escalated to a human instead.
+        
         Args:
             user_input: The customer's question or request
             max_iterations: Maximum number of reasoning iterations
+            on_token: Optional callback receiving final-answer text as the LLM
+                generates it. Only an answer the agent keeps is sent, already
+                cleaned, so the streamed text matches the returned response.
+            batched: Wait for each complete LLM response instead of streaming
+                it, so the calls are batched with other concurrent runs by
+                the BatchingLLM. Tools then start only once the response is
+                complete. Ignored when on_token is given.
             
         Returns:
             str: The agent's response
         """
         start_time = time.time()
-        self.tool_results = []  # Reset for this request
+        try:
+            return await asyncio.wait_for(
+                self._arun_inner(user_input, max_iterations, on_token, start_time, batched and on_token is None),
+                timeout=settings.agent_timeout_s
+            )
+        except asyncio.TimeoutError:
+            ticket_id = EscalationManager.create_ticket_deferred(
+                session_id=self.session_id,
+                customer_id=None,
+                issue_type="timeout",
+                description=f"User query: {user_input}\nReason: No answer within {settings.agent_timeout_s:g}s",
+                priority="medium"
+            )
+            log_escalation(ticket_id, self.session_id, "Agent timed out")
+            
+            escalation_message = f"""
+I'm sorry, this is taking longer than it should. I've created a support ticket so a human agent can pick it up.
+
+**Ticket ID:** {ticket_id}
+**Status:** Open
+
+A support agent will review your request and contact you within 24 hours.
+"""
+            self.memory.add_message("assistant", escalation_message)
+            await asyncio.to_thread(self.memory.flush)
+            log_agent_request(self.session_id, user_input, escalation_message, time.time() - start_time)
+            _count_route("timeout")
+            return escalation_message
+    
+    async def _arun_inner(
+        self,
+        user_input: str,
+        max_iterations: int,
+        on_token: Optional[Callable[[str], None]],
+        start_time: float,
+        batched: bool = False
+    ) -> str:
+        """Body of arun(), without the overall timeout."""
+        tool_results: List[str] = []  # This request's tool results, for escalation detection
         
         try:
             # Save user message to memory
             self.memory.add_message("user", user_input)
             logger.info(f"User query: {user_input}", extra={"session_id": self.session_id, "user_input": user_input})
             
-            # Check if query should be escalated immediately
-            should_escalate, escalation_reason = EscalationManager.should_escalate(user_input)
+            # Check if query should be escalated immediately (only when a trigger phrase is present)
+            should_escalate, escalation_reason = False, ""
+            if _ESCALATION_PREFILTER_RE.search(user_input):
+                should_escalate, escalation_reason = EscalationManager.should_escalate(user_input)
             if should_escalate:
-                ticket_id = EscalationManager.create_ticket(
+                ticket_id = EscalationManager.create_ticket_deferred(
                     session_id=self.session_id,
                     customer_id=None,
                     issue_type="explicit_request",
@@ -380,206 +968,196 @@ A human support agent will contact you shortly. Expected response time: Within 1
 Is there anything I can help you with in the meantime?
 """
                 self.memory.add_message("assistant", escalation_message)
+                await asyncio.to_thread(self.memory.flush)
                 log_agent_request(self.session_id, user_input, escalation_message, time.time() - start_time)
+                _count_route("escalation")
                 return escalation_message
             
-            # Build tool descriptions
-            tool_descriptions = "\n".join([
-                f"- {tool.name}: {tool.description}"
-                for tool in self.tools
-            ])
+            # Detect query type; paraphrases without any intent keyword fall back to embeddings
+            intents = _detect_intents(user_input)
+            if (not intents and settings.intent_classifier_enabled
+                    and not _GREETING_RE.fullmatch(user_input.strip())):
+                classified = await asyncio.to_thread(get_intent_classifier().classify, user_input)
+                intents = classified & _CLASSIFIER_INTENTS
+            
+            # DIRECT path: templated answers that need no LLM call
+            direct = await self._direct_response(user_input, intents)
+            if direct:
+                route, direct_response = direct
+                _count_route(route)
+                self.memory.add_message("assistant", direct_response)
+                log_agent_request(self.session_id, user_input, direct_response, time.time() - start_time)
+                return direct_response
+            
+            # Serve generic questions from the semantic cache
+            cacheable = _is_cacheable(user_input, intents)
+            if cacheable:
+                cached_response = await asyncio.to_thread(get_semantic_cache().get, user_input)
+                if cached_response:
+                    _count_route("cache")
+                    self.memory.add_message("assistant", cached_response)
+                    log_agent_request(self.session_id, user_input, cached_response, time.time() - start_time)
+                    return cached_response
+                # Only answers given without earlier conversation are shared
+                cacheable = len(await asyncio.to_thread(self.memory.get_history, limit=2)) <= 1
             
             # Get conversation context
-            conversation_context = self.memory.get_context_string(limit=3)
+            conversation_context = await asyncio.to_thread(self.memory.get_context_string, limit=3)
             
-            # Start with system prompt
-            system_prompt = AGENT_SYSTEM_PROMPT.format(
-                tool_descriptions=tool_descriptions,
-                conversation_context=f"\n{conversation_context}\n" if conversation_context != "No previous conversation." else ""
-            )
+            # Conversation context leads the user message, after the static system prompt
+            context_block = f"{conversation_context}\n\n" if conversation_context != "No previous conversation." else ""
             
             conversation_history = []
+            prefetch = []  # (label, tool_name, tool_input) lookups that don't depend on each other
             
-            # Detect query type
-            query_lower = user_input.lower()
+            # Order ID and email shared by the refund and replacement paths, looked
+            # up in the message, then the conversation context, then recent memory
+            slots: Dict[str, str] = {}
+            if "refund_action" in intents or "replacement" in intents:
+                recent_messages = await asyncio.to_thread(self.memory.get_history, limit=5)
+                slots = self._extract_slots((
+                    user_input,
+                    conversation_context,
+                    *(msg.get('content', '') for msg in recent_messages),
+                ))
             
             # ⚡ PROACTIVE REFUND DETECTION - Check this FIRST before any slow operations
-            import re
-            if any(kw in query_lower for kw in ["refund", "proceed", "process"]):
-                order_id_match = re.search(r'ord\d+', user_input, re.IGNORECASE)
-                email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', user_input)
-                
-                # Check conversation history for missing parameters
-                full_conversation = conversation_context + " " + user_input
-                if not order_id_match:
-                    order_id_match = re.search(r'ord\d+', full_conversation, re.IGNORECASE)
-                if not email_match:
-                    email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', full_conversation)
-                
-                # Also check recent memory
-                recent_messages = self.memory.get_history(limit=5)
-                for msg in recent_messages:
-                    content = msg.get('content', '')
-                    if not order_id_match:
-                        order_id_match = re.search(r'ord\d+', content, re.IGNORECASE)
-                    if not email_match:
-                        email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', content)
-                
-                print(f"🔍 Refund keywords detected in: {user_input}")
-                print(f"📋 Order ID found: {order_id_match.group().upper() if order_id_match else 'NO'}")
-                print(f"📧 Email found: {email_match.group() if email_match else 'NO'}")
+            if "refund_action" in intents:
+                logger.debug(
+                    f"🔍 Refund keywords detected - order ID: {slots.get('order_id', 'NO')}, "
+                    f"email: {slots.get('email', 'NO')}"
+                )
                 
                 # If we have both order_id and email, execute refund immediately (skip all other processing)
-                if order_id_match and email_match:
-                    order_id = order_id_match.group().upper()
-                    email = email_match.group()
-                    print(f"✅ Both found! AUTO-EXECUTING REFUND: {order_id} | {email}")
-                    print(f"⚡ PROCESSING REFUND NOW (skipping FAQ/LLM)...")
-                    
-                    refund_result = self._execute_tool("process_refund_for_order", f"{order_id}|{email}")
-                    
-                    # Save to memory and return immediately
-                    self.memory.add_message("user", user_input)
-                    self.memory.add_message("assistant", refund_result)
-                    
-                    print(f"✅ REFUND COMPLETE! Returning result.")
-                    return refund_result
+                if "order_id" in slots and "email" in slots:
+                    return await self._run_plan("refund_complete", user_input, slots, tool_results, start_time)
             
             # Only do slow FAQ searches if not a complete refund request
             # Check for order-related queries
-            if any(keyword in query_lower for keyword in ["order", "ord", "where is my", "track"]):
+            if "order" in intents:
                 # Extract order ID if present
-                order_match = re.search(r'ord\d+', user_input, re.IGNORECASE)
+                order_match = _ORDER_RE.search(user_input)
                 if order_match:
                     order_id = order_match.group().upper()
-                    print(f"🔍 Detected order query, fetching order {order_id}")
-                    order_result = self._execute_tool("fetch_order", order_id)
-                    conversation_history.append(f"Order Data:\n{order_result}\n")
+                    logger.debug(f"🔍 Detected order query, fetching order {order_id}")
+                    prefetch.append(("Order Data", "fetch_order", order_id))
                 else:
                     # Order query detected but no order ID provided
-                    print(f"🔍 Order query detected but no order ID provided")
+                    logger.debug(f"🔍 Order query detected but no order ID provided")
                     conversation_history.append("INSTRUCTION: Customer is asking about their order but hasn't provided an order ID. You MUST ask them for their order number (format: ORDXXXXX) before you can help them track it.\n")
             
             # ⚡ PROACTIVE REPLACEMENT DETECTION - Similar to refund detection
-            if any(keyword in query_lower for keyword in ["replacement", "replace", "defective", "wrong item", "damaged", "quality issue"]):
-                order_id_match = re.search(r'ord\d+', user_input, re.IGNORECASE)
-                
-                # Check conversation history for missing order ID
-                full_conversation = conversation_context + " " + user_input
-                if not order_id_match:
-                    order_id_match = re.search(r'ord\d+', full_conversation, re.IGNORECASE)
-                
-                # Also check recent memory for order ID
-                recent_messages = self.memory.get_history(limit=5)
-                for msg in recent_messages:
-                    content = msg.get('content', '')
-                    if not order_id_match:
-                        order_id_match = re.search(r'ord\d+', content, re.IGNORECASE)
-                
+            if "replacement" in intents:
                 # Detect reason from keywords
                 reason = "defective_product"  # default
-                if "wrong item" in query_lower or "wrong product" in query_lower:
+                if "reason_wrong_item" in intents:
                     reason = "wrong_item"
-                elif "damaged" in query_lower or "broken" in query_lower:
+                elif "reason_damaged" in intents:
                     reason = "damaged_delivery"
-                elif "quality" in query_lower or "defective" in query_lower:
+                elif "reason_defective" in intents:
                     reason = "defective_product"
                 
-                # Try to get email
-                email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', full_conversation)
-                if not email_match:
-                    for msg in recent_messages:
-                        content = msg.get('content', '')
-                        if not email_match:
-                            email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', content)
-                
-                print(f"🔍 Replacement keywords detected in: {user_input}")
-                print(f"📋 Order ID found: {order_id_match.group().upper() if order_id_match else 'NO'}")
-                print(f"📧 Email found: {email_match.group() if email_match else 'NO'}")
-                print(f"🔧 Reason detected: {reason}")
+                logger.debug(
+                    f"🔍 Replacement keywords detected - order ID: {slots.get('order_id', 'NO')}, "
+                    f"email: {slots.get('email', 'NO')}, reason: {reason}"
+                )
                 
                 # If we have order_id, process replacement (email not strictly required for DB lookup)
-                if order_id_match:
-                    order_id = order_id_match.group().upper()
+                if "order_id" in slots:
+                    order_id = slots["order_id"]
                     
                     # Get email - either from conversation or fetch from order
-                    if email_match:
-                        email = email_match.group()
+                    if "email" in slots:
+                        email = slots["email"]
                     else:
                         # Fetch email from order record
-                        conn = get_db_connection()
-                        cursor = conn.cursor()
-                        cursor.execute("SELECT c.email FROM orders o LEFT JOIN customers c ON o.customer_id = c.id WHERE o.order_id = ?", (order_id,))
-                        result = cursor.fetchone()
-                        conn.close()
-                        email = result[0] if result and result[0] else "customer@example.com"
-                    
-                    print(f"✅ Processing replacement: {order_id} | {email} | {reason}")
-                    print(f"⚡ EXECUTING REPLACEMENT NOW (skipping FAQ/LLM)...")
-                    
-                    replacement_result = self._execute_tool("request_product_replacement", f"{order_id}|{email}|{reason}")
+                        email = await asyncio.to_thread(self._fetch_email_for_order, order_id) or "customer@example.com"
                     
-                    # Save to memory and return immediately
-                    self.memory.add_message("user", user_input)
-                    self.memory.add_message("assistant", replacement_result)
-                    
-                    print(f"✅ REPLACEMENT REQUEST COMPLETE! Returning result.")
-                    return replacement_result
+                    return await self._run_plan("replacement_complete", user_input, {
+                        "order_id": order_id,
+                        "email": email,
+                        "reason": reason,
+                    }, tool_results, start_time)
                 else:
                     # No order ID found, ask for it
                     conversation_history.append("INSTRUCTION: Customer is requesting a product replacement. You MUST ask them for their order number (format: ORDXXXXX) before you can help them.\n")
             
             # Check for refund queries (only if we didn't already process complete refund above)
-            if any(keyword in query_lower for keyword in ["refund", "return", "money back"]):
-                print(f"🔍 Detected refund query, searching FAQ")
-                faq_result = self._execute_tool("semantic_search_faq", "refund policy")
-                conversation_history.append(f"Refund Policy:\n{faq_result}\n")
+            if "refund_policy" in intents:
+                logger.debug(f"🔍 Detected refund query, searching FAQ")
+                prefetch.append(("Refund Policy", "semantic_search_faq", "refund policy"))
+            
+            # Run the independent lookups gathered above concurrently
+            if prefetch:
+                results = await asyncio.gather(*(
+                    self._aexecute_tool(name, tool_input, tool_results) for _, name, tool_input in prefetch
+                ))
+                for (label, _, _), result in zip(prefetch, results):
+                    conversation_history.append(f"{label}:\n{_truncate_result(result)}\n")
             
             # For general queries, do FAQ search
             if not conversation_history:
-                print(f"🔍 Performing FAQ search for: {user_input}")
+                logger.debug(f"🔍 Performing FAQ search for: {user_input}")
                 try:
-                    faq_result = self._execute_tool("semantic_search_faq", user_input)
-                    conversation_history.append(f"FAQ Search Result:\n{faq_result}\n")
+                    faq_result = await self._aexecute_tool("semantic_search_faq", user_input, tool_results)
+                    conversation_history.append(f"FAQ Search Result:\n{_truncate_result(faq_result)}\n")
                 except Exception as e:
-                    print(f"⚠️  FAQ search failed: {e}")
+                    logger.warning(f"FAQ search failed: {e}", extra={"session_id": self.session_id})
             
             # Add user query
             conversation_history.append(f"Customer Question: {user_input}\n")
             
+            # Gathered context is fixed from here on and opens the conversation;
+            # each tool round is appended as its own messages so the prompt
+            # prefix only grows, keeping the latest rounds
+            gathered = "\n".join(conversation_history)
+            opening = HumanMessage(content=f"{context_block}{gathered}{_REASONING_INSTRUCTIONS}")
+            rounds = deque(maxlen=_MAX_OBSERVATIONS)  # (AIMessage, HumanMessage) per tool round
+            
             # Reasoning loop
             for iteration in range(max_iterations):
-                print(f"🤔 Reasoning iteration {iteration + 1}/{max_iterations}")
+                logger.debug(f"🤔 Reasoning iteration {iteration + 1}/{max_iterations}")
                 
-                # Build prompt with history
-                full_prompt = f"""{system_prompt}
-
-{' '.join(conversation_history)}
-
-**Instructions:**
-- If you have tool results above, you MUST use the actual data in your response
-- If you need more data, call a tool with JSON: {{"action": "tool_name", "action_input": "value"}}
-- If you have enough data, respond with "FINAL ANSWER:" followed by your complete response using the ACTUAL data from tool results
-- NEVER use placeholders like "[insert X here]" or generic responses - always use the specific data provided"""
+                # Tools start as soon as their action JSON is streamed, overlapping
+                # with the rest of the generation; same batching rule as below
+                launched = []  # (action, task) in response order
+                dependent_seen = False
+                
+                def launch(action: Dict[str, Any]):
+                    nonlocal dependent_seen
+                    started = [started_action for started_action, _ in launched]
+                    if dependent_seen or len(_independent_actions([*started, action])) == len(started):
+                        dependent_seen = True
+                        return
+                    launched.append((action, asyncio.create_task(
+                        self._aexecute_tool(action["action"], action.get("action_input", ""), tool_results)
+                    )))
                 
                 # Get LLM response
-                response = self.llm.invoke(full_prompt)
-                response_text = response.content if hasattr(response, 'content') else str(response)
+                answer_stream = _AnswerStream(on_token, self._clean_response) if on_token else None
+                response_text = await self._ainvoke_llm(
+                    [opening, *(message for tool_round in rounds for message in tool_round)],
+                    stop_on_action=not batched,
+                    on_token=answer_stream.feed if answer_stream else None,
+                    on_action=None if batched else launch
+                )
                 
-                print(f"💭 LLM Response: {response_text[:200]}...")
+                logger.debug(f"💭 LLM Response: {response_text[:200]}...")
                 
-                # Check if this is a final answer
-                if "FINAL ANSWER:" in response_text.upper():
+                # Check if this is a final answer (a tool already started must be observed first)
+                if not launched and _FINAL_ANSWER_RE.search(response_text):
                     # Extract final answer
-                    final_answer = response_text.split("FINAL ANSWER:")[-1].strip()
+                    final_answer = _FINAL_ANSWER_RE.split(response_text)[-1].strip()
                     if not final_answer or final_answer.startswith("{"):
                         # LLM didn't provide answer after "FINAL ANSWER:", continue
                         continue
                     
                     # Clean technical jargon from response
                     final_answer = self._clean_response(final_answer)
+                    if answer_stream:
+                        answer_stream.finish(final_answer)
                     
-                    print(f"✅ Final answer generated")
+                    logger.debug(f"✅ Final answer generated")
                     
                     # Save to memory
                     self.memory.add_message("assistant", final_answer)
@@ -587,27 +1165,39 @@ Is there anything I can help you with in the meantime?
                     # Log the request
                     processing_time = time.time() - start_time
                     log_agent_request(self.session_id, user_input, final_answer, processing_time)
+                    _count_route("llm")
+                    
+                    if cacheable:
+                        await asyncio.to_thread(get_semantic_cache().set, user_input, final_answer)
                     
                     return final_answer
                 
-                # Try to parse action
-                action = self._parse_action(response_text)
+                # Try to parse actions
+                actions = self._parse_actions(response_text)
                 
-                if action and "action" in action:
-                    tool_name = action["action"]
-                    tool_input = action.get("action_input", "")
-                    
-                    # Execute tool
-                    tool_result = self._execute_tool(tool_name, tool_input)
+                if actions:
+                    # Execute independent tools concurrently, reusing those started while streaming
+                    batch = _independent_actions(actions)
+                    round_results = await asyncio.gather(
+                        *(task for _, task in launched),
+                        *(self._aexecute_tool(action["action"], action.get("action_input", ""), tool_results)
+                          for action in batch[len(launched):])
+                    )
                     
-                    # Add to conversation history
-                    conversation_history.append(f"Tool Used: {tool_name}\nTool Input: {tool_input}\nTool Result: {tool_result}\n")
+                    # Add the round to the conversation
+                    observations = "\n".join(
+                        f"Tool Used: {action['action']}\nTool Input: {action.get('action_input', '')}\nTool Result: {_truncate_result(tool_result)}\n"
+                        for action, tool_result in zip(batch, round_results)
+                    )
+                    rounds.append((AIMessage(content=response_text), HumanMessage(content=observations)))
                 else:
                     # No action found, treat as final answer
-                    print(f"✅ No more actions needed, using response as final answer")
+                    logger.debug(f"✅ No more actions needed, using response as final answer")
                     
                     # Clean technical jargon from response
                     cleaned_response = self._clean_response(response_text)
+                    if answer_stream:
+                        answer_stream.finish(cleaned_response)
                     
                     # Save to memory
                     self.memory.add_message("assistant", cleaned_response)
@@ -615,21 +1205,25 @@ Is there anything I can help you with in the meantime?
                     # Log the request
                     processing_time = time.time() - start_time
                     log_agent_request(self.session_id, user_input, cleaned_response, processing_time)
+                    _count_route("llm")
+                    
+                    if cacheable:
+                        await asyncio.to_thread(get_semantic_cache().set, user_input, cleaned_response)
                     
                     return cleaned_response
             
             # If we exhausted iterations, check if we should escalate
             should_escalate_after, escalation_reason = EscalationManager.should_escalate(
                 user_input, 
-                tool_results=self.tool_results
+                tool_results=tool_results
             )
             
             if should_escalate_after:
-                ticket_id = EscalationManager.create_ticket(
+                ticket_id = EscalationManager.create_ticket_deferred(
                     session_id=self.session_id,
                     customer_id=None,
                     issue_type="complex_query",
-                    description=f"User query: {user_input}\nReason: {escalation_reason}\nTool results: {self.tool_results[:3]}",
+                    description=f"User query: {user_input}\nReason: {escalation_reason}\nTool results: {tool_results[:3]}",
                     priority="medium",
                     confidence_score=0.2
                 )
@@ -644,23 +1238,27 @@ I apologize, but I'm having difficulty resolving your issue automatically. I've
 A support agent will review your case and contact you within 24 hours.
 """
                 self.memory.add_message("assistant", escalation_message)
+                await asyncio.to_thread(self.memory.flush)
                 log_agent_request(self.session_id, user_input, escalation_message, time.time() - start_time)
+                _count_route("escalation")
                 return escalation_message
             
             # If we exhausted iterations, ask LLM for final answer
-            print("⚠️  Max iterations reached, generating final answer")
-            final_prompt = f"""{system_prompt}
-
-{' '.join(conversation_history)}
-
-Based on all the information above, provide your FINAL ANSWER to the customer's question in a natural, human-like way: {user_input}
-Remember: Be warm, friendly, and never mention technical processes."""
+            logger.debug("⚠️  Max iterations reached, generating final answer")
+            final_prompt = HumanMessage(content=f"""Based on all the information above, provide your FINAL ANSWER to the customer's question in a natural, human-like way: {user_input}
+Remember: Be warm, friendly, and never mention technical processes.""")
             
-            final_response = self.llm.invoke(final_prompt)
-            final_text = final_response.content if hasattr(final_response, 'content') else str(final_response)
+            answer_stream = _AnswerStream(on_token, self._clean_response) if on_token else None
+            final_text = await self._ainvoke_llm(
+                [opening, *(message for tool_round in rounds for message in tool_round), final_prompt],
+                stop_on_action=False,
+                on_token=answer_stream.feed if answer_stream else None
+            )
             
-            # Clean the response
-            final_text = self._clean_response(final_text)
+            # Clean the response, keeping only the answer if it was marked as one
+            final_text = self._clean_response(_FINAL_ANSWER_RE.split(final_text)[-1])
+            if answer_stream:
+                answer_stream.finish(final_text)
             
             # Save to memory
             self.memory.add_message("assistant", final_text)
@@ -668,40 +1266,105 @@ Remember: Be warm, friendly, and never mention technical processes."""
             # Log the request
             processing_time = time.time() - start_time
             log_agent_request(self.session_id, user_input, final_text, processing_time)
+            _count_route("llm")
+            
+            if cacheable:
+                await asyncio.to_thread(get_semantic_cache().set, user_input, final_text)
             
             return final_text
         
         except Exception as e:
             error_msg = f"I apologize, but I encountered an error while processing your request. Please try again or rephrase your question."
-            logger.error(f"Agent error: {e}", extra={"session_id": self.session_id}, exc_info=True)
-            print(f"❌ Agent error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Agent error: {e}", extra={"session_id": self.session_id})
             
             # Save error to memory
             self.memory.add_message("assistant", error_msg)
+            await asyncio.to_thread(self.memory.flush)
             
             return error_msg
 
 
-# Global agent instance
-_agent = None
+def new_session_id() -> str:
+    """Generate a unique conversation session ID."""
+    return f"session_{uuid.uuid4().hex[:12]}"
 
 
-def get_agent(model_name: Optional[str] = None) -> CustomerSupportAgent:
+# Agent instances by session ID, least recently used first
+_AGENTS: "OrderedDict[str, CustomerSupportAgent]" = OrderedDict()
+_AGENTS_LOCK = threading.Lock()
+_MAX_AGENTS = 1000
+
+
+def get_agent(session_id: Optional[str] = None, model_name: Optional[str] = None) -> CustomerSupportAgent:
     """
-    Get or create the global customer support agent instance.
+    Get or create the customer support agent for a session.
+    
+    Each session gets its own agent so concurrent chats never share
+    session state. The least recently used agents are evicted beyond
+    _MAX_AGENTS; their conversation history stays in the database.
     
     Args:
-        model_name: Optional model name override
+        session_id: Session ID; a new session is started when omitted
+        model_name: Optional model name override (default: settings.model_name).
+            A session's agent is rebuilt if it was created for another model.
         
     Returns:
-        CustomerSupportAgent: The agent instance
+        CustomerSupportAgent: The agent instance for the session
     """
-    global _agent
-    if _agent is None:
-        _agent = CustomerSupportAgent(model_name=model_name)
-    return _agent
+    session_id = session_id or new_session_id()
+    model_name = model_name or settings.model_name
+    with _AGENTS_LOCK:
+        agent = _AGENTS.get(session_id)
+        if agent is None or agent.model_name != model_name:
+            agent = _AGENTS[session_id] = CustomerSupportAgent(model_name=model_name, session_id=session_id)
+            _AGENTS.move_to_end(session_id)
+            if len(_AGENTS) > _MAX_AGENTS:
+                _AGENTS.popitem(last=False)
+        else:
+            _AGENTS.move_to_end(session_id)
+        return agent
+
+
+async def run_batch_async(
+    inputs: List[str],
+    session_ids: Optional[List[Optional[str]]] = None,
+    concurrency: int = 16
+) -> List[str]:
+    """
+    Run many messages through the agent concurrently, e.g. for evaluation runs.
+    
+    Messages for the same session run in order, one at a time; different
+    sessions run in parallel, at most `concurrency` messages at once. Runs
+    don't stream their LLM responses (see arun's `batched`), so the
+    concurrent LLM calls are grouped into batches by the BatchingLLM.
+    
+    Args:
+        inputs: User messages
+        session_ids: Session ID for each message; messages without one
+            each start a new session
+        concurrency: Maximum number of messages processed at once
+        
+    Returns:
+        List[str]: The agent's responses, in input order
+    """
+    if session_ids is None:
+        session_ids = [None] * len(inputs)
+    
+    sessions: Dict[str, List[int]] = {}
+    for index, session_id in enumerate(session_ids):
+        sessions.setdefault(session_id or new_session_id(), []).append(index)
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    responses: List[str] = [""] * len(inputs)
+    
+    async def run_session(session_id: str, indices: List[int]) -> None:
+        agent = get_agent(session_id)
+        for index in indices:
+            async with semaphore:
+                responses[index] = await agent.arun(inputs[index], batched=True)
+    
+    await asyncio.gather(*(run_session(session_id, indices) for session_id, indices in sessions.items()))
+    return responses
 
 
 if __name__ == "__main__":
@@ -1,14 +1,30 @@
 """FastAPI main application for Autonomous Customer Support Agent."""
 
+import threading
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from app.routes import chat
-from app.services.database import initialize_db
+from app.services.database import ensure_initialized, shutdown_pool, start_analyze_worker, stop_analyze_worker
+from app.services.email_service import email_service
+from app.services.escalation import flush_escalation_tasks
+from app.services.memory import flush_messages
+from app.services.slack_service import slack_service
 from app.utils.config import settings
 
 
+def _warm_vectorstore():
+    """Create the vector store singleton; imported here as chromadb is slow to import."""
+    try:
+        from app.services.vectorstore import get_vectorstore
+        get_vectorstore()
+    except Exception as e:
+        print(f"⚠️  Vector store warm-up warning: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -20,15 +36,26 @@ async def lifespan(app: FastAPI):
     print(f"🌍 Environment: {settings.environment}")
     
     try:
-        initialize_db()
+        ensure_initialized()
         print("✅ Database initialized")
     except Exception as e:
         print(f"⚠️  Database initialization warning: {e}")
+    start_analyze_worker()
+    
+    # Load the vector store and embedding model in the background so the
+    # first FAQ search doesn't pay for it
+    threading.Thread(target=_warm_vectorstore, name="vectorstore-warmup", daemon=True).start()
     
     yield
     
-    # Shutdown
+    # Shutdown: make sure queued messages, tickets, notifications and emails are written
     print("👋 Shutting down...")
+    flush_messages()
+    flush_escalation_tasks()
+    slack_service.close()
+    email_service.flush()
+    stop_analyze_worker()
+    shutdown_pool()
 
 
 # Create FastAPI application
@@ -36,6 +63,7 @@ app = FastAPI(
     title=settings.app_name,
     description="An autonomous customer support agent using ReAct workflow with LangChain",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -1,10 +1,13 @@
 """Chat routes for the FastAPI application."""
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
-from app.agent import get_agent
+from app.agent import get_agent, new_session_id, run_batch_async
 
 
 router = APIRouter(prefix="/chat", tags=["chat"])
@@ -34,16 +37,11 @@ async def chat_endpoint(request: ChatRequest):
         ChatResponse: The agent's response with session_id
     """
     try:
-        # Get or create agent instance with session_id
-        agent = get_agent()
-        
-        # Update agent with session ID if provided
-        if request.session_id:
-            agent.session_id = request.session_id
-            agent.memory.session_id = request.session_id
+        # Get or create the agent for this session
+        agent = get_agent(request.session_id)
         
         # Run the agent with the user's message
-        response = agent.run(request.message)
+        response = await agent.arun(request.message)
         
         return ChatResponse(
             response=response,
@@ -57,6 +55,91 @@ async def chat_endpoint(request: ChatRequest):
         )
 
 
+@router.post("/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Streaming chat endpoint that sends the agent's answer as it is generated.
+    
+    Responses that aren't generated token by token (escalations, completed
+    refunds or replacements, cached answers) are sent as a single chunk.
+    
+    Args:
+        request: ChatRequest containing the user's message and optional session_id
+        
+    Returns:
+        StreamingResponse: Plain-text answer stream, session ID in the X-Session-ID header
+    """
+    try:
+        # Get or create the agent for this session
+        agent = get_agent(request.session_id)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing chat request: {str(e)}"
+        )
+    
+    tokens: asyncio.Queue = asyncio.Queue()
+    
+    async def run_agent() -> str:
+        try:
+            return await agent.arun(request.message, on_token=tokens.put_nowait)
+        finally:
+            tokens.put_nowait(None)  # End of stream
+    
+    run_task = asyncio.create_task(run_agent())
+    
+    async def stream_answer():
+        streamed = ""
+        while (token := await tokens.get()) is not None:
+            streamed += token
+            yield token
+        response = await run_task
+        if not streamed:
+            yield response
+        elif not response.startswith(streamed):
+            # The run ended with a different response (e.g. it timed out
+            # mid-answer and escalated); send that after what was streamed
+            yield "\n\n" + response
+    
+    return StreamingResponse(
+        stream_answer(),
+        media_type="text/plain",
+        headers={"X-Session-ID": agent.session_id}
+    )
+
+
+@router.post("/batch", response_model=List[ChatResponse])
+async def chat_batch_endpoint(requests: List[ChatRequest]):
+    """
+    Batch chat endpoint for bulk and offline workloads.
+    
+    Messages sharing a session_id are answered in order; everything else
+    runs concurrently.
+    
+    Args:
+        requests: ChatRequests, each with a message and optional session_id
+        
+    Returns:
+        List[ChatResponse]: The agent's responses, in request order
+    """
+    session_ids = [request.session_id or new_session_id() for request in requests]
+    
+    try:
+        responses = await run_batch_async([request.message for request in requests], session_ids)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing chat batch: {str(e)}"
+        )
+    
+    return [
+        ChatResponse(response=response, session_id=session_id)
+        for response, session_id in zip(responses, session_ids)
+    ]
+
+
 @router.get("/health")
 async def chat_health():
     """Health check endpoint for the chat service."""
@@ -0,0 +1,224 @@
+"""Semantic response cache for frequently asked customer questions."""
+
+import re
+import time
+import hashlib
+import threading
+from typing import Optional
+
+import numpy as np
+
+from app.utils.config import settings
+from app.utils.logging_config import logger
+
+
+_PUNCT_RE = re.compile(r'[^\w\s@]')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query and strip punctuation and repeated whitespace."""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", query.lower())).strip()
+
+
+class SemanticCache:
+    """
+    Cache of final agent responses keyed by query embedding.
+
+    Entries live in their own Chroma collection (cosine space), embedded with
+    the collection's default model. A lookup hits when the closest cached
+    query is at least `threshold` similar and its entry hasn't expired.
+    """
+
+    def __init__(
+        self,
+        collection_name: str = "response_cache",
+        threshold: Optional[float] = None,
+        ttl: Optional[int] = None
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            collection_name: Chroma collection holding cached responses
+            threshold: Minimum cosine similarity for a hit
+            ttl: Seconds a cached response stays fresh
+        """
+        self.collection_name = collection_name
+        self.threshold = threshold if threshold is not None else settings.semantic_cache_threshold
+        self.ttl = ttl if ttl is not None else settings.semantic_cache_ttl
+        self.collection = None
+
+    def _get_collection(self):
+        """Get or create the cache collection on the shared Chroma client."""
+        if self.collection is None:
+            # Imported on first use; chromadb is slow to import
+            from app.services.vectorstore import get_vectorstore
+            self.collection = get_vectorstore().client.get_or_create_collection(
+                name=self.collection_name,
+                metadata={"hnsw:space": "cosine"}
+            )
+        return self.collection
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize a query with normalize_query, shared with the RAG tools' caches."""
+        return normalize_query(query)
+
+    def get(self, query: str) -> Optional[str]:
+        """
+        Look up a cached response for a semantically similar query.
+
+        Args:
+            query: The customer's question
+
+        Returns:
+            Optional[str]: The cached response, or None on a miss
+        """
+        try:
+            results = self._get_collection().query(
+                query_texts=[self.normalize(query)],
+                n_results=1,
+                include=["metadatas", "distances"]
+            )
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+
+        if not results["ids"] or not results["ids"][0]:
+            return None
+
+        entry_id = results["ids"][0][0]
+        metadata = results["metadatas"][0][0]
+        similarity = 1 - results["distances"][0][0]
+
+        if metadata["expires_at"] < time.time():
+            self._get_collection().delete(ids=[entry_id])
+            return None
+        if similarity < self.threshold:
+            return None
+
+        logger.info(f"Semantic cache hit (similarity {similarity:.3f})")
+        return metadata["response"]
+
+    def set(self, query: str, response: str):
+        """
+        Cache a response for a query.
+
+        Args:
+            query: The customer's question
+            response: The final response sent to the customer
+        """
+        normalized = self.normalize(query)
+        try:
+            self._get_collection().upsert(
+                ids=[hashlib.sha1(normalized.encode()).hexdigest()],
+                documents=[normalized],
+                metadatas=[{"response": response, "expires_at": time.time() + self.ttl}]
+            )
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
+
+
+class EmbeddingResultCache:
+    """
+    Small in-process cache of search results keyed by query embedding.
+    
+    Embeddings are kept as unit-normalized float32 rows of one preallocated
+    matrix, so a lookup is a single matrix-vector product. Once full, the
+    oldest entry is overwritten. Entries are tagged with the index
+    generation they were computed against; a lookup for a newer generation
+    empties the cache.
+    """
+    
+    def __init__(self, threshold: float = 0.95, max_entries: int = 512):
+        """
+        Initialize the cache.
+        
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Entries kept before the oldest is overwritten
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._embeddings: Optional[np.ndarray] = None
+        self._n_results = np.zeros(max_entries, dtype=np.int32)
+        self._results: list = [None] * max_entries
+        self._size = 0
+        self._next = 0
+        self._generation = 0
+    
+    def _sync_generation(self, generation: int) -> bool:
+        """Drop entries from an older index generation; False if `generation` is itself stale."""
+        if generation > self._generation:
+            self._size = 0
+            self._next = 0
+            self._results = [None] * self.max_entries
+            self._generation = generation
+        return generation == self._generation
+    
+    def get(self, embedding: np.ndarray, n_results: int, generation: int = 0) -> Optional[str]:
+        """
+        Look up a result cached for a similar query.
+        
+        Args:
+            embedding: The query's embedding
+            n_results: Result count the query asked for; only entries for the same count match
+            generation: Current index generation
+            
+        Returns:
+            Optional[str]: The cached result, or None on a miss
+        """
+        query = embedding / np.linalg.norm(embedding)
+        with self._lock:
+            if not self._sync_generation(generation) or not self._size:
+                return None
+            scores = np.where(
+                self._n_results[:self._size] == n_results,
+                self._embeddings[:self._size] @ query,
+                -1.0
+            )
+            best = int(scores.argmax())
+            if scores[best] < self.threshold:
+                return None
+            return self._results[best]
+    
+    def set(self, embedding: np.ndarray, n_results: int, result: str, generation: int = 0):
+        """
+        Cache a result for a query.
+        
+        Args:
+            embedding: The query's embedding
+            n_results: Result count the query asked for
+            result: The result to return for similar queries
+            generation: Index generation the result was computed against
+        """
+        with self._lock:
+            if not self._sync_generation(generation):
+                return
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self.max_entries, embedding.shape[-1]), dtype=np.float32)
+            slot = self._next
+            self._embeddings[slot] = embedding / np.linalg.norm(embedding)
+            self._n_results[slot] = n_results
+            self._results[slot] = result
+            self._next = (slot + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+
+# Global semantic cache instance
+_semantic_cache = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """
+    Get or create the global semantic cache instance.
+
+    Returns:
+        SemanticCache: The semantic cache instance
+    """
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
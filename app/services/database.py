@@ -1,37 +1,288 @@
 """Database service layer for SQLite operations."""
 
+import queue
 import sqlite3
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
 from pathlib import Path
 
 from app.utils.config import settings
+from app.utils.logging_config import logger
+
+# Applied to every new connection. WAL lets readers run alongside the writer;
+# with WAL, synchronous=NORMAL is still safe against corruption.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # 64 MB page cache
+    "PRAGMA mmap_size=268435456",  # Read pages through a 256 MB memory map
+    "PRAGMA analysis_limit=1000",  # Bound the rows ANALYZE / optimize sample per index
+)
 
 
 def get_db_connection():
     """
     Create and return a SQLite database connection.
     
+    Prefer db_conn() for short-lived use; this opens a new connection that
+    the caller must close. The schema is created on the first call.
+    
     Returns:
         sqlite3.Connection: Database connection object
     """
+    ensure_initialized()
+    
     db_path = Path(settings.database_path)
     db_path.parent.mkdir(parents=True, exist_ok=True)
     
-    conn = sqlite3.connect(str(db_path))
+    # Pooled connections move between threads, but only one uses it at a time
+    conn = sqlite3.connect(str(db_path), check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row  # Enable dictionary-like access
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# Process-wide pool of open connections, most recently used first so the
+# warmest page caches are reused. Connections are opened on demand, up to
+# settings.db_pool_size; callers beyond that wait for one to be returned.
+_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+_pool_lock = threading.Lock()
+_pool_opened = 0
+
+
+def _acquire_connection() -> sqlite3.Connection:
+    """Take a connection from the pool, opening one if the pool isn't full yet."""
+    global _pool_opened
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        pass
+    with _pool_lock:
+        if _pool_opened < settings.db_pool_size:
+            _pool_opened += 1
+            open_new = True
+        else:
+            open_new = False
+    if not open_new:
+        return _pool.get()
+    try:
+        conn = get_db_connection()
+    except Exception:
+        with _pool_lock:
+            _pool_opened -= 1
+        raise
+    # Autocommit: reads run without a transaction, and writes go through
+    # transaction(), which opens one explicitly with BEGIN IMMEDIATE
+    conn.isolation_level = None
+    return conn
+
+
+@contextmanager
+def db_conn(conn: Optional[sqlite3.Connection] = None) -> Iterator[sqlite3.Connection]:
+    """
+    Borrow a pooled SQLite connection for the duration of a with block.
+    
+    Pooled connections are in autocommit mode; use transaction() for writes.
+    A transaction left open when the block exits is rolled back before the
+    connection goes back to the pool.
+    
+    Args:
+        conn: Optional connection the caller is already using; it is used as-is
+    
+    Yields:
+        sqlite3.Connection: Database connection object
+    """
+    if conn is not None:
+        yield conn
+        return
+    conn = _acquire_connection()
+    try:
+        yield conn
+    finally:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Broken connection: drop it so a fresh one is opened next time
+            global _pool_opened
+            conn.close()
+            with _pool_lock:
+                _pool_opened -= 1
+        else:
+            _pool.put(conn)
+
+
+@contextmanager
+def transaction(conn: Optional[sqlite3.Connection] = None) -> Iterator[sqlite3.Connection]:
+    """
+    Run a block of statements as one write transaction.
+    
+    With no connection, borrows one from the pool and runs the block between
+    BEGIN IMMEDIATE and COMMIT (rolling back if it raises). Taking the write
+    lock up front means writers queue on BEGIN instead of failing with
+    SQLITE_BUSY when a read transaction would have to be upgraded; WAL
+    readers are unaffected. With a connection, joins the caller's
+    transaction on it and leaves committing to the caller.
+    
+    Args:
+        conn: Optional connection the caller is already using
+        
+    Yields:
+        sqlite3.Connection: Database connection object
+    """
+    if conn is not None:
+        yield conn
+        return
+    with db_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+        conn.execute("COMMIT")
+
+
+def shutdown_pool() -> None:
+    """Close every idle pooled connection (e.g. on shutdown or between tests)."""
+    global _pool_opened
+    while True:
+        try:
+            conn = _pool.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            # Refresh planner statistics the connection's queries showed to be stale
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        conn.close()
+        with _pool_lock:
+            _pool_opened -= 1
+
+
+# Per-thread connections for hot read paths
+_thread_local = threading.local()
+
+
+def get_thread_connection():
+    """
+    Return a SQLite connection owned by and reused within the calling thread.
+    
+    Unlike get_db_connection, callers must not close the returned connection.
+    Reusing it keeps SQLite's page and statement caches warm across calls.
+    
+    Returns:
+        sqlite3.Connection: Database connection object
+    """
+    conn = getattr(_thread_local, "conn", None)
+    if conn is None:
+        conn = get_db_connection()
+        _thread_local.conn = conn
     return conn
 
 
-def initialize_db():
+def analyze() -> None:
+    """Refresh the query planner's statistics so it keeps choosing the indexes."""
+    with db_conn() as conn:
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+
+
+# Set to stop the periodic ANALYZE thread started by start_analyze_worker
+_analyze_stop = threading.Event()
+_analyze_thread: Optional[threading.Thread] = None
+
+
+def _analyze_worker() -> None:
+    """Run analyze() every settings.analyze_interval_sec until stopped."""
+    while not _analyze_stop.wait(settings.analyze_interval_sec):
+        try:
+            analyze()
+        except Exception:
+            logger.exception("Periodic ANALYZE failed")
+
+
+def start_analyze_worker() -> None:
+    """Start the periodic ANALYZE thread if it isn't already running."""
+    global _analyze_thread
+    if _analyze_thread is not None and _analyze_thread.is_alive():
+        return
+    _analyze_stop.clear()
+    _analyze_thread = threading.Thread(target=_analyze_worker, name="db-analyze", daemon=True)
+    _analyze_thread.start()
+
+
+def stop_analyze_worker(timeout: float = 10.0) -> None:
+    """
+    Stop the periodic ANALYZE thread, waiting for a run in progress to finish.
+    
+    Args:
+        timeout: Seconds to wait for the thread to exit
+    """
+    global _analyze_thread
+    _analyze_stop.set()
+    if _analyze_thread is not None:
+        _analyze_thread.join(timeout)
+        _analyze_thread = None
+
+
+# Schema initialization state. The lock is re-entrant because initialize_db
+# opens connections itself, which calls back into ensure_initialized.
+_init_lock = threading.RLock()
+_initialized = False
+_initializing = False
+
+
+def ensure_initialized() -> None:
+    """Initialize the database schema once per process; later calls return immediately."""
+    if _initialized:
+        return
+    with _init_lock:
+        if not _initialized and not _initializing:
+            initialize_db()
+
+
+def initialize_db(with_indexes: bool = True):
     """
     Initialize the database schema.
     
-    TODO: Create tables for customers, orders, tickets, etc.
-    This is a placeholder for future implementation.
+    Creates any missing tables (customers, orders, payments, conversation
+    history, support tickets, order tracking) in one transaction, then the
+    indexes. Safe to run on an existing database; existing tables and data
+    are left as they are.
+    
+    Args:
+        with_indexes: Also create indexes; bulk loaders pass False and call
+            create_indexes() once the data is in
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    global _initialized, _initializing
+    with _init_lock:
+        _initializing = True
+        try:
+            # One transaction (and one sync) for all table DDL
+            with transaction() as conn:
+                _create_tables(conn.cursor())
+            
+            if with_indexes:
+                create_indexes()
+            _initialized = True
+        finally:
+            _initializing = False
     
+    logger.info("✅ Database initialized successfully")
+
+
+def create_indexes():
+    """Create indexes for the app's query patterns, in a single transaction."""
+    with transaction() as conn:
+        _create_indexes(conn.cursor())
+        # Give the planner statistics for any new index right away rather
+        # than at the next periodic ANALYZE (bounded by analysis_limit)
+        conn.execute("ANALYZE")
+
+
+def _create_tables(cursor: sqlite3.Cursor) -> None:
+    """Create any missing tables."""
     # Create customers table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS customers (
@@ -114,11 +365,41 @@ def initialize_db():
             FOREIGN KEY (order_id) REFERENCES orders (order_id)
         )
     """)
+
+
+def _create_indexes(cursor: sqlite3.Cursor) -> None:
+    """Create any missing indexes (ticket_id and order_id are already UNIQUE)."""
+    # Conversation history by session, newest first (read by scanning backwards)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_conv_session_ts
+        ON conversation_history (session_id, timestamp)
+    """)
+    
+    # Open ticket queue
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_status_prio
+        ON support_tickets (status, priority, created_at)
+    """)
     
-    conn.commit()
-    conn.close()
+    # A customer's orders, newest first (read by scanning backwards); this
+    # supersedes the old single-column idx_orders_customer
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_orders_customer_date
+        ON orders (customer_id, order_date)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_orders_customer")
     
-    print("✅ Database initialized successfully")
+    # Latest tracking update for an order
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tracking_order_updated
+        ON order_tracking (order_id, updated_at)
+    """)
+    
+    # Foreign key lookups
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_payments_order
+        ON payments (order_id)
+    """)
 
 
 if __name__ == "__main__":
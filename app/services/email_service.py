@@ -1,103 +1,29 @@
 """Email notification service for customer communications."""
+import queue
+import string
 import smtplib
+import threading
+from contextlib import contextmanager
 from email.mime.text import MIMEText
+from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
+from email.utils import formatdate
 from datetime import datetime
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 from ..utils.config import settings
 
 logger = logging.getLogger(__name__)
 
-class EmailService:
-    """Service for sending email notifications to customers."""
-    
-    def __init__(self):
-        self.smtp_server = settings.smtp_server
-        self.smtp_port = settings.smtp_port
-        self.smtp_username = settings.smtp_username
-        self.smtp_password = settings.smtp_password
-        self.sender_email = settings.sender_email
-        self.enabled = settings.email_enabled
-        
-    def send_email(self, to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> bool:
-        """
-        Send an email to the specified recipient.
-        
-        Args:
-            to_email: Recipient email address
-            subject: Email subject
-            body: Plain text email body
-            html_body: Optional HTML email body
-            
-        Returns:
-            bool: True if email sent successfully, False otherwise
-        """
-        if not self.enabled:
-            logger.warning("Email service is disabled. Skipping email send.")
-            return False
-            
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.sender_email
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            msg['Date'] = datetime.now().strftime("%a, %d %b %Y %H:%M:%S %z")
-            
-            # Attach plain text
-            part1 = MIMEText(body, 'plain')
-            msg.attach(part1)
-            
-            # Attach HTML if provided
-            if html_body:
-                part2 = MIMEText(html_body, 'html')
-                msg.attach(part2)
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
-            
-            logger.info(f"Email sent successfully to {to_email}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {str(e)}")
-            return False
-    
-    def send_refund_notification(
-        self, 
-        to_email: str, 
-        order_id: str, 
-        refund_amount: float,
-        currency: str = "USD",
-        customer_name: str = "Customer"
-    ) -> bool:
-        """
-        Send refund processing notification email.
-        
-        Args:
-            to_email: Customer email address
-            order_id: Order ID being refunded
-            refund_amount: Amount being refunded
-            currency: Currency code (USD, INR, etc.)
-            customer_name: Customer's name
-            
-        Returns:
-            bool: True if email sent successfully
-        """
-        subject = f"Refund Processing for Order {order_id}"
-        
-        # Plain text body
-        body = f"""Dear {customer_name},
+# Notification bodies, parsed once at import and filled in with substitute()
+_REFUND_TEXT_TEMPLATE = string.Template("""Dear $customer_name,
 
-We are processing your refund request for order {order_id}.
+We are processing your refund request for order $order_id.
 
 Refund Details:
-- Order ID: {order_id}
-- Refund Amount: {currency} {refund_amount:.2f}
-- Processing Date: {datetime.now().strftime('%B %d, %Y')}
+- Order ID: $order_id
+- Refund Amount: $currency $refund_amount
+- Processing Date: $processing_date
 
 The refund has been initiated and will be credited to your original payment method within 5-7 business days, though it may appear sooner depending on your bank's processing time.
 
@@ -108,19 +34,18 @@ Thank you for your patience and understanding.
 Best regards,
 Customer Support Team
 Autonomous Customer Support Agent
-"""
-        
-        # HTML body
-        html_body = f"""
+""")
+
+_REFUND_HTML_TEMPLATE = string.Template("""
         <html>
           <head>
             <style>
-              body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-              .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-              .header {{ background-color: #4CAF50; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }}
-              .content {{ background-color: #f9f9f9; padding: 20px; border: 1px solid #ddd; }}
-              .details {{ background-color: white; padding: 15px; margin: 15px 0; border-left: 4px solid #4CAF50; }}
-              .footer {{ text-align: center; padding: 20px; color: #777; font-size: 12px; }}
+              body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+              .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+              .header { background-color: #4CAF50; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }
+              .content { background-color: #f9f9f9; padding: 20px; border: 1px solid #ddd; }
+              .details { background-color: white; padding: 15px; margin: 15px 0; border-left: 4px solid #4CAF50; }
+              .footer { text-align: center; padding: 20px; color: #777; font-size: 12px; }
             </style>
           </head>
           <body>
@@ -129,15 +54,15 @@ Autonomous Customer Support Agent
                 <h2>Refund Processing Confirmation</h2>
               </div>
               <div class="content">
-                <p>Dear {customer_name},</p>
-                <p>We are processing your refund request for order <strong>{order_id}</strong>.</p>
+                <p>Dear $customer_name,</p>
+                <p>We are processing your refund request for order <strong>$order_id</strong>.</p>
                 
                 <div class="details">
                   <h3>Refund Details:</h3>
                   <ul>
-                    <li><strong>Order ID:</strong> {order_id}</li>
-                    <li><strong>Refund Amount:</strong> {currency} {refund_amount:.2f}</li>
-                    <li><strong>Processing Date:</strong> {datetime.now().strftime('%B %d, %Y')}</li>
+                    <li><strong>Order ID:</strong> $order_id</li>
+                    <li><strong>Refund Amount:</strong> $currency $refund_amount</li>
+                    <li><strong>Processing Date:</strong> $processing_date</li>
                   </ul>
                 </div>
                 
@@ -157,60 +82,37 @@ Autonomous Customer Support Agent
             </div>
           </body>
         </html>
-        """
-        
-        return self.send_email(to_email, subject, body, html_body)
-    
-    def send_ticket_created_notification(
-        self,
-        to_email: str,
-        ticket_id: str,
-        order_id: str,
-        customer_name: str = "Customer"
-    ) -> bool:
-        """
-        Send notification when support ticket is created.
-        
-        Args:
-            to_email: Customer email address
-            ticket_id: Support ticket ID
-            order_id: Related order ID
-            customer_name: Customer's name
-            
-        Returns:
-            bool: True if email sent successfully
-        """
-        subject = f"Support Ticket Created - {ticket_id}"
-        
-        body = f"""Dear {customer_name},
+        """)
+
+_TICKET_TEXT_TEMPLATE = string.Template("""Dear $customer_name,
 
 Your support request has been received and a ticket has been created.
 
 Ticket Details:
-- Ticket ID: {ticket_id}
-- Order ID: {order_id}
-- Created: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
+- Ticket ID: $ticket_id
+- Order ID: $order_id
+- Created: $created
 
 A human support representative will review your request and contact you within 4 hours.
 
-You can reference ticket ID {ticket_id} for any follow-up inquiries.
+You can reference ticket ID $ticket_id for any follow-up inquiries.
 
 Thank you for your patience.
 
 Best regards,
 Customer Support Team
-"""
-        
-        html_body = f"""
+""")
+
+_TICKET_HTML_TEMPLATE = string.Template("""
         <html>
           <head>
             <style>
-              body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-              .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-              .header {{ background-color: #2196F3; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }}
-              .content {{ background-color: #f9f9f9; padding: 20px; border: 1px solid #ddd; }}
-              .ticket-box {{ background-color: white; padding: 15px; margin: 15px 0; border-left: 4px solid #2196F3; }}
-              .footer {{ text-align: center; padding: 20px; color: #777; font-size: 12px; }}
+              body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+              .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+              .header { background-color: #2196F3; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }
+              .content { background-color: #f9f9f9; padding: 20px; border: 1px solid #ddd; }
+              .ticket-box { background-color: white; padding: 15px; margin: 15px 0; border-left: 4px solid #2196F3; }
+              .footer { text-align: center; padding: 20px; color: #777; font-size: 12px; }
             </style>
           </head>
           <body>
@@ -219,21 +121,21 @@ Customer Support Team
                 <h2>Support Ticket Created</h2>
               </div>
               <div class="content">
-                <p>Dear {customer_name},</p>
+                <p>Dear $customer_name,</p>
                 <p>Your support request has been received and a ticket has been created.</p>
                 
                 <div class="ticket-box">
                   <h3>Ticket Details:</h3>
                   <ul>
-                    <li><strong>Ticket ID:</strong> {ticket_id}</li>
-                    <li><strong>Order ID:</strong> {order_id}</li>
-                    <li><strong>Created:</strong> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</li>
+                    <li><strong>Ticket ID:</strong> $ticket_id</li>
+                    <li><strong>Order ID:</strong> $order_id</li>
+                    <li><strong>Created:</strong> $created</li>
                   </ul>
                 </div>
                 
                 <p>A human support representative will review your request and contact you within <strong>4 hours</strong>.</p>
                 
-                <p>You can reference ticket ID <strong>{ticket_id}</strong> for any follow-up inquiries.</p>
+                <p>You can reference ticket ID <strong>$ticket_id</strong> for any follow-up inquiries.</p>
                 
                 <p>Thank you for your patience.</p>
                 
@@ -246,7 +148,238 @@ Customer Support Team
             </div>
           </body>
         </html>
+        """)
+
+
+class EmailService:
+    """Service for sending email notifications to customers."""
+    
+    def __init__(self):
+        self.smtp_server = settings.smtp_server
+        self.smtp_port = settings.smtp_port
+        self.smtp_username = settings.smtp_username
+        self.smtp_password = settings.smtp_password
+        self.sender_email = settings.sender_email
+        self.enabled = settings.email_enabled
+        
+        # Outgoing mail is sent by background threads over pooled, logged-in
+        # SMTP connections, so callers never wait on the SMTP handshake
+        self.pool_size = settings.smtp_pool_size
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._pool: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue()
+        for i in range(self.pool_size):
+            threading.Thread(target=self._send_worker, name=f"email-sender-{i}", daemon=True).start()
+    
+    def _build_message(self, to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> MIMEBase:
+        """Build the MIME message for an email."""
+        if html_body:
+            # Plain text with an HTML alternative
+            msg = MIMEMultipart('alternative')
+            msg.attach(MIMEText(body, 'plain'))
+            msg.attach(MIMEText(html_body, 'html'))
+        else:
+            # Plain text only; no multipart wrapper needed
+            msg = MIMEText(body, 'plain')
+        
+        msg['From'] = self.sender_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg['Date'] = formatdate(localtime=True)
+        
+        return msg
+    
+    def _connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP connection."""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        server.starttls()
+        server.login(self.smtp_username, self.smtp_password)
+        return server
+    
+    @contextmanager
+    def _acquire(self) -> Iterator[smtplib.SMTP]:
+        """
+        Borrow a pooled SMTP connection, connecting if none is idle.
+        
+        An idle connection is checked with NOOP before reuse and replaced if
+        the server has dropped it. A connection is discarded if anything
+        raises while it is borrowed; the pool refills with new connections
+        as needed.
+        """
+        try:
+            server = self._pool.get_nowait()
+        except queue.Empty:
+            server = self._connect()
+        else:
+            try:
+                if server.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP rejected")
+            except (smtplib.SMTPException, OSError):
+                server.close()
+                server = self._connect()
+        try:
+            yield server
+        except BaseException:
+            server.close()
+            raise
+        if self._pool.qsize() < self.pool_size:
+            self._pool.put(server)
+        else:
+            server.quit()
+    
+    def _deliver(self, msg: MIMEBase) -> None:
+        """Send a message over a pooled connection, retrying once on a dropped connection."""
+        try:
+            with self._acquire() as server:
+                server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server closed an idle pooled connection
+            with self._acquire() as server:
+                server.send_message(msg)
+    
+    def _send_worker(self) -> None:
+        """Send queued emails."""
+        while True:
+            to_email, subject, body, html_body = self._queue.get()
+            try:
+                self._deliver(self._build_message(to_email, subject, body, html_body))
+                logger.info(f"Email sent successfully to {to_email}")
+            except Exception as e:
+                logger.error(f"Failed to send email to {to_email}: {str(e)}")
+            finally:
+                self._queue.task_done()
+    
+    def send_email(self, to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> bool:
+        """
+        Queue an email to the specified recipient.
+        
+        The email is sent by a background thread; delivery failures are
+        logged there. Use send_sync to wait for the result.
+        
+        Args:
+            to_email: Recipient email address
+            subject: Email subject
+            body: Plain text email body
+            html_body: Optional HTML email body
+            
+        Returns:
+            bool: True if the email was accepted for sending, False if email is disabled
+        """
+        if not self.enabled:
+            logger.warning("Email service is disabled. Skipping email send.")
+            return False
+        
+        self._queue.put((to_email, subject, body, html_body))
+        return True
+    
+    def send_sync(self, to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> bool:
+        """
+        Send an email immediately, waiting for the result.
+        
+        Args:
+            to_email: Recipient email address
+            subject: Email subject
+            body: Plain text email body
+            html_body: Optional HTML email body
+            
+        Returns:
+            bool: True if email sent successfully, False otherwise
+        """
+        if not self.enabled:
+            logger.warning("Email service is disabled. Skipping email send.")
+            return False
+            
+        try:
+            self._deliver(self._build_message(to_email, subject, body, html_body))
+            
+            logger.info(f"Email sent successfully to {to_email}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to send email to {to_email}: {str(e)}")
+            return False
+    
+    def flush(self) -> None:
+        """Block until every queued email has been sent or has failed (e.g. on shutdown)."""
+        self._queue.join()
+    
+    def send_refund_notification(
+        self, 
+        to_email: str, 
+        order_id: str, 
+        refund_amount: float,
+        currency: str = "USD",
+        customer_name: str = "Customer",
+        sent_at: Optional[datetime] = None
+    ) -> bool:
         """
+        Send refund processing notification email.
+        
+        Args:
+            to_email: Customer email address
+            order_id: Order ID being refunded
+            refund_amount: Amount being refunded
+            currency: Currency code (USD, INR, etc.)
+            customer_name: Customer's name
+            sent_at: Processing time to show; bulk senders pass one shared value
+            
+        Returns:
+            bool: True if the email was accepted for sending
+        """
+        # Skip rendering the bodies when nothing will be sent
+        if not self.enabled:
+            logger.warning("Email service is disabled. Skipping email send.")
+            return False
+        
+        subject = f"Refund Processing for Order {order_id}"
+        fields = {
+            "customer_name": customer_name,
+            "order_id": order_id,
+            "currency": currency,
+            "refund_amount": f"{refund_amount:.2f}",
+            "processing_date": (sent_at or datetime.now()).strftime('%B %d, %Y'),
+        }
+        
+        body = _REFUND_TEXT_TEMPLATE.substitute(fields)
+        html_body = _REFUND_HTML_TEMPLATE.substitute(fields)
+        
+        return self.send_email(to_email, subject, body, html_body)
+    
+    def send_ticket_created_notification(
+        self,
+        to_email: str,
+        ticket_id: str,
+        order_id: str,
+        customer_name: str = "Customer",
+        sent_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        Send notification when support ticket is created.
+        
+        Args:
+            to_email: Customer email address
+            ticket_id: Support ticket ID
+            order_id: Related order ID
+            customer_name: Customer's name
+            sent_at: Creation time to show; bulk senders pass one shared value
+            
+        Returns:
+            bool: True if the email was accepted for sending
+        """
+        # Skip rendering the bodies when nothing will be sent
+        if not self.enabled:
+            logger.warning("Email service is disabled. Skipping email send.")
+            return False
+        
+        subject = f"Support Ticket Created - {ticket_id}"
+        fields = {
+            "customer_name": customer_name,
+            "ticket_id": ticket_id,
+            "order_id": order_id,
+            "created": (sent_at or datetime.now()).strftime('%B %d, %Y at %I:%M %p'),
+        }
+        
+        body = _TICKET_TEXT_TEMPLATE.substitute(fields)
+        html_body = _TICKET_HTML_TEMPLATE.substitute(fields)
         
         return self.send_email(to_email, subject, body, html_body)
 
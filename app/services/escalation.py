@@ -1,17 +1,123 @@
 """Human escalation system for handling complex queries."""
 
-import uuid
-from typing import Optional, Dict, List
+import re
+import time
+import queue
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Callable, Iterator
 from datetime import datetime
 
-from app.services.database import get_db_connection
+from app.services.database import db_conn, transaction
 from app.services.email_service import email_service
 from app.services.slack_service import slack_service
+from app.utils.logging_config import logger
 from langchain.tools import tool
 
+# Phrases that mean the customer wants (or needs) a human
+ESCALATION_KEYWORDS = (
+    "speak to human", "talk to person", "real person", "human agent",
+    "not satisfied", "complaint", "legal", "lawsuit", "fraud",
+    "emergency", "urgent", "critical", "manager", "supervisor"
+)
+
+# Legal/contractual topics the agent should not handle
+COMPLEX_KEYWORDS = ("legal", "lawsuit", "attorney", "contract", "terms violation")
+
+# Each keyword list as one case-insensitive alternation, so a query is
+# scanned once per list (keywords still match anywhere, as substrings)
+_ESCALATION_RE = re.compile("|".join(map(re.escape, ESCALATION_KEYWORDS)), re.IGNORECASE)
+_COMPLEX_RE = re.compile("|".join(map(re.escape, COMPLEX_KEYWORDS)), re.IGNORECASE)
+
+# A tool result that reports a failure
+_ERR_RE = re.compile("error|❌", re.IGNORECASE)
+
+
+# Ticket writes and notifications that shouldn't hold up the customer's reply
+_ESCALATION_Q: "queue.Queue[tuple]" = queue.Queue()
+
+
+def _escalation_worker() -> None:
+    """Drain queued escalation work on a background thread."""
+    while True:
+        func, args, kwargs = _ESCALATION_Q.get()
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception(f"Background escalation task {getattr(func, '__name__', func)} failed")
+        finally:
+            _ESCALATION_Q.task_done()
+
+
+threading.Thread(target=_escalation_worker, name="escalation-writer", daemon=True).start()
+
+
+def submit_escalation_task(func: Callable, *args, **kwargs) -> None:
+    """Queue a call to run on the background escalation writer."""
+    _ESCALATION_Q.put((func, args, kwargs))
+
+
+def flush_escalation_tasks() -> None:
+    """Block until every queued escalation task has run (e.g. on shutdown)."""
+    _ESCALATION_Q.join()
+
+
+# Recently read tickets, for customers polling check_ticket_status:
+# ticket ID -> (read time, ticket), least recently used first
+_TICKET_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_TICKET_CACHE_LOCK = threading.Lock()
+_TICKET_TTL = 5.0
+_TICKET_CACHE_SIZE = 1024
+
+# Attempts, and the base backoff in seconds, for a deferred ticket insert
+_DEFERRED_INSERT_ATTEMPTS = 3
+_DEFERRED_INSERT_BACKOFF = 0.5
+
+# SQL is kept in module constants so every call passes the same statement
+# text and hits the connection's prepared-statement cache
+_INSERT_TICKET_SQL = """
+    INSERT INTO support_tickets 
+    (ticket_id, session_id, customer_id, issue_type, description, priority, confidence_score)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_TICKET_BY_ID_SQL = """
+    SELECT * FROM support_tickets
+    WHERE ticket_id = ?
+"""
+
+# Served in order by the (status, priority, created_at) index
+_OPEN_TICKETS_SQL = """
+    SELECT * FROM support_tickets
+    WHERE status = 'open'
+    ORDER BY priority DESC, created_at DESC
+"""
+_OPEN_TICKETS_PAGE_SQL = _OPEN_TICKETS_SQL + "LIMIT ? OFFSET ?"
+
+_RESOLVE_TICKET_SQL = """
+    UPDATE support_tickets
+    SET status = 'resolved', resolved_at = CURRENT_TIMESTAMP
+    WHERE ticket_id = ?
+"""
+
 
 class EscalationManager:
-    """Manages ticket creation and escalation logic."""
+    """
+    Manages ticket creation and escalation logic.
+    
+    Database methods take an optional `conn`; pass the connection from
+    transaction() to run several of them on one connection and commit.
+    """
+    
+    @staticmethod
+    @contextmanager
+    def transaction() -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection for several ticket operations, committing at the end."""
+        with transaction() as conn:
+            yield conn
     
     @staticmethod
     def create_ticket(
@@ -20,7 +126,8 @@ class EscalationManager:
         issue_type: str,
         description: str,
         priority: str = "medium",
-        confidence_score: Optional[float] = None
+        confidence_score: Optional[float] = None,
+        conn: Optional[sqlite3.Connection] = None
     ) -> str:
         """
         Create a support ticket for human escalation.
@@ -32,25 +139,130 @@ class EscalationManager:
             description: Detailed description of the issue
             priority: low, medium, high, urgent
             confidence_score: Agent's confidence score (0-1)
+            conn: Optional connection from transaction()
             
         Returns:
             Ticket ID
         """
-        ticket_id = f"TKT{uuid.uuid4().hex[:8].upper()}"
+        ticket_id = EscalationManager._new_ticket_id()
+        EscalationManager._insert_ticket(
+            ticket_id, session_id, customer_id, issue_type, description, priority, confidence_score, conn
+        )
+        return ticket_id
+    
+    @staticmethod
+    def create_ticket_deferred(
+        session_id: str,
+        customer_id: Optional[str],
+        issue_type: str,
+        description: str,
+        priority: str = "medium",
+        confidence_score: Optional[float] = None
+    ) -> str:
+        """
+        Create a support ticket without blocking on the database or Slack.
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        The ticket ID is allocated immediately; the insert and the Slack
+        notification run on the background escalation writer (see
+        _insert_ticket_deferred).
         
-        cursor.execute("""
-            INSERT INTO support_tickets 
-            (ticket_id, session_id, customer_id, issue_type, description, priority, confidence_score)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (ticket_id, session_id, customer_id, issue_type, description, priority, confidence_score))
+        Args:
+            Same as create_ticket
+            
+        Returns:
+            Ticket ID
+        """
+        ticket_id = EscalationManager._new_ticket_id()
+        submit_escalation_task(
+            EscalationManager._insert_ticket_deferred,
+            ticket_id, session_id, customer_id, issue_type, description, priority, confidence_score
+        )
+        return ticket_id
+    
+    @staticmethod
+    def _insert_ticket_deferred(
+        ticket_id: str,
+        session_id: str,
+        customer_id: Optional[str],
+        issue_type: str,
+        description: str,
+        priority: str,
+        confidence_score: Optional[float]
+    ) -> None:
+        """
+        Insert a ticket queued by create_ticket_deferred, then notify Slack.
+        
+        The customer already has the ticket ID, so nobody is waiting to see
+        an exception. A busy database is retried with the same ID; an ID
+        collision is retried under a fresh ID, and the Slack notification
+        records the ID the customer was given. If the insert still fails,
+        the failure is logged at error level and posted to Slack as an
+        urgent ticket so the escalation isn't lost.
+        """
+        stored_id = ticket_id
+        error: Optional[Exception] = None
+        for attempt in range(_DEFERRED_INSERT_ATTEMPTS):
+            try:
+                EscalationManager._insert_ticket(
+                    stored_id, session_id, customer_id, issue_type, description, priority, confidence_score
+                )
+                break
+            except sqlite3.IntegrityError as e:
+                # ticket_id is the only unique column, so this is an ID collision
+                error = e
+                stored_id = EscalationManager._new_ticket_id()
+                logger.warning("Ticket ID %s already exists; storing the ticket as %s", ticket_id, stored_id)
+            except sqlite3.OperationalError as e:
+                # Typically "database is locked"; back off and try again
+                error = e
+                time.sleep(_DEFERRED_INSERT_BACKOFF * (attempt + 1))
+        else:
+            logger.error(
+                "Could not save ticket %s (session %s, %s priority) after %d attempts: %s",
+                ticket_id, session_id, priority, _DEFERRED_INSERT_ATTEMPTS, error
+            )
+            slack_service.send_support_ticket_notification(
+                ticket_id=ticket_id,
+                issue=f"⚠️ This ticket could not be saved to the database ({error}).\n\n{description}",
+                customer_email="Not provided",
+                priority="urgent"
+            )
+            return
         
-        conn.commit()
-        conn.close()
+        issue = description
+        if stored_id != ticket_id:
+            issue = f"{description}\n\n(The customer was given ticket ID {ticket_id}.)"
+        slack_service.send_support_ticket_notification(
+            ticket_id=stored_id,
+            issue=issue,
+            customer_email="Not provided",
+            priority=priority
+        )
+    
+    @staticmethod
+    def _new_ticket_id() -> str:
+        """
+        Generate a new ticket ID.
         
-        return ticket_id
+        IDs are fully random (64 bits), so separate worker processes can't
+        collide and customers can't guess each other's tickets.
+        """
+        return f"TKT{secrets.token_hex(8).upper()}"
+    
+    @staticmethod
+    def _insert_ticket(
+        ticket_id: str,
+        session_id: str,
+        customer_id: Optional[str],
+        issue_type: str,
+        description: str,
+        priority: str,
+        confidence_score: Optional[float],
+        conn: Optional[sqlite3.Connection] = None
+    ) -> None:
+        """Persist a support ticket row."""
+        with transaction(conn) as conn:
+            conn.execute(_INSERT_TICKET_SQL, (ticket_id, session_id, customer_id, issue_type, description, priority, confidence_score))
     
     @staticmethod
     def should_escalate(
@@ -69,83 +281,109 @@ class EscalationManager:
         Returns:
             Tuple of (should_escalate: bool, reason: str)
         """
-        # Escalation triggers
-        escalation_keywords = [
-            "speak to human", "talk to person", "real person", "human agent",
-            "not satisfied", "complaint", "legal", "lawsuit", "fraud",
-            "emergency", "urgent", "critical", "manager", "supervisor"
-        ]
-        
-        query_lower = query.lower()
-        
         # Check for explicit human request
-        for keyword in escalation_keywords:
-            if keyword in query_lower:
-                return True, f"Customer explicitly requested: {keyword}"
+        match = _ESCALATION_RE.search(query)
+        if match:
+            return True, f"Customer explicitly requested: {match.group().lower()}"
         
         # Check if tools failed
         if tool_results:
-            error_count = sum(1 for result in tool_results if "error" in result.lower() or "❌" in result)
-            if error_count >= 2:
-                return True, "Multiple tool failures detected"
+            error_count = 0
+            for result in tool_results:
+                if _ERR_RE.search(result):
+                    error_count += 1
+                    if error_count >= 2:
+                        return True, "Multiple tool failures detected"
         
         # Check for complex legal/financial queries
-        complex_keywords = ["legal", "lawsuit", "attorney", "contract", "terms violation"]
-        if any(keyword in query_lower for keyword in complex_keywords):
+        if _COMPLEX_RE.search(query):
             return True, "Complex legal/contractual query detected"
         
         return False, ""
     
     @staticmethod
-    def get_ticket(ticket_id: str) -> Optional[Dict]:
-        """Get ticket details by ID."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+    def get_ticket(ticket_id: str, conn: Optional[sqlite3.Connection] = None) -> Optional[Dict]:
+        """
+        Get ticket details by ID.
         
-        cursor.execute("""
-            SELECT * FROM support_tickets
-            WHERE ticket_id = ?
-        """, (ticket_id,))
+        Reads are cached for _TICKET_TTL seconds, except inside a caller's
+        transaction (when `conn` is given).
+        """
+        if conn is None:
+            with _TICKET_CACHE_LOCK:
+                cached = _TICKET_CACHE.get(ticket_id)
+                if cached and time.monotonic() - cached[0] < _TICKET_TTL:
+                    _TICKET_CACHE.move_to_end(ticket_id)
+                    return dict(cached[1])
         
-        ticket = cursor.fetchone()
-        conn.close()
+        with db_conn(conn) as db:
+            ticket = db.execute(_TICKET_BY_ID_SQL, (ticket_id,)).fetchone()
         
-        if ticket:
-            return dict(ticket)
-        return None
+        if not ticket:
+            return None
+        ticket = dict(ticket)
+        if conn is None:
+            with _TICKET_CACHE_LOCK:
+                _TICKET_CACHE[ticket_id] = (time.monotonic(), ticket)
+                _TICKET_CACHE.move_to_end(ticket_id)
+                if len(_TICKET_CACHE) > _TICKET_CACHE_SIZE:
+                    _TICKET_CACHE.popitem(last=False)
+        return dict(ticket)
     
     @staticmethod
-    def get_open_tickets() -> List[Dict]:
-        """Get all open tickets."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT * FROM support_tickets
-            WHERE status = 'open'
-            ORDER BY priority DESC, created_at DESC
-        """)
+    def get_open_tickets(
+        limit: int = 100,
+        offset: int = 0,
+        conn: Optional[sqlite3.Connection] = None
+    ) -> List[Dict]:
+        """
+        Get a page of open tickets, highest priority and newest first.
         
-        tickets = cursor.fetchall()
-        conn.close()
+        Args:
+            limit: Maximum number of tickets to return
+            offset: Number of tickets to skip
+            conn: Optional connection from transaction()
+            
+        Returns:
+            List of ticket dictionaries
+        """
+        with db_conn(conn) as conn:
+            tickets = conn.execute(_OPEN_TICKETS_PAGE_SQL, (limit, offset)).fetchall()
         
         return [dict(ticket) for ticket in tickets]
     
     @staticmethod
-    def resolve_ticket(ticket_id: str, resolution_notes: Optional[str] = None) -> bool:
-        """Mark ticket as resolved."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+    def iter_open_tickets(batch_size: int = 100) -> Iterator[Dict]:
+        """
+        Stream every open ticket in priority order, batch_size rows at a time.
+        
+        Holds a pooled connection until the iterator is exhausted or closed.
         
-        cursor.execute("""
-            UPDATE support_tickets
-            SET status = 'resolved', resolved_at = CURRENT_TIMESTAMP
-            WHERE ticket_id = ?
-        """, (ticket_id,))
+        Args:
+            batch_size: Rows fetched from SQLite per batch
+            
+        Yields:
+            Ticket dictionaries
+        """
+        with db_conn() as conn:
+            cursor = conn.execute(_OPEN_TICKETS_SQL)
+            while batch := cursor.fetchmany(batch_size):
+                for ticket in batch:
+                    yield dict(ticket)
+    
+    @staticmethod
+    def resolve_ticket(
+        ticket_id: str,
+        resolution_notes: Optional[str] = None,
+        conn: Optional[sqlite3.Connection] = None
+    ) -> bool:
+        """Mark ticket as resolved."""
+        with transaction(conn) as conn:
+            cursor = conn.execute(_RESOLVE_TICKET_SQL, (ticket_id,))
+            success = cursor.rowcount > 0
         
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        with _TICKET_CACHE_LOCK:
+            _TICKET_CACHE.pop(ticket_id, None)
         
         return success
 
@@ -175,13 +413,15 @@ def create_support_ticket(issue_description: str, order_id: str = "", customer_e
         # Generate a session ID (in real system, would come from context)
         session_id = f"SESSION_{datetime.now().strftime('%Y%m%d%H%M%S')}"
         
-        ticket_id = EscalationManager.create_ticket(
-            session_id=session_id,
-            customer_id=None,
-            issue_type="complex_query",
-            description=issue_description,
-            priority=priority
-        )
+        with EscalationManager.transaction() as conn:
+            ticket_id = EscalationManager.create_ticket(
+                session_id=session_id,
+                customer_id=None,
+                issue_type="complex_query",
+                description=issue_description,
+                priority=priority,
+                conn=conn
+            )
         
         # Send email notification if email provided
         email_confirmation = ""
@@ -0,0 +1,127 @@
+"""Embedding-based intent classifier for queries the keyword scan misses."""
+
+import threading
+from typing import Optional
+
+import numpy as np
+
+from app.utils.config import settings
+from app.utils.logging_config import logger
+
+
+# Canonical phrasings for each intent the agent plans around. Queries that
+# use none of the intent keywords ("my package hasn't arrived") are matched
+# against these by meaning instead. The agent only acts on read-only
+# matches; the replacement and cancel prototypes stay so those paraphrases
+# aren't pulled towards the order intent instead.
+INTENT_PROTOTYPES = {
+    "order": (
+        "where is my order",
+        "my package hasn't arrived",
+        "I didn't get my order",
+        "when will my delivery arrive",
+        "track my package",
+    ),
+    "refund_policy": (
+        "what is your return policy",
+        "can I send this back",
+        "how do I get my money back",
+    ),
+    "replacement": (
+        "my item arrived broken",
+        "you sent me the wrong thing",
+        "the product stopped working",
+    ),
+    "cancel": (
+        "cancel my order",
+        "I don't want this order anymore",
+    ),
+}
+
+
+class IntentClassifier:
+    """
+    Nearest-prototype intent classifier.
+
+    Prototype phrases are embedded once into a unit-normalized float32 matrix;
+    a query is classified with one matrix-vector product against it. Uses the
+    same default embedding model as the Chroma collections.
+    """
+
+    def __init__(self, threshold: Optional[float] = None):
+        """
+        Initialize the classifier.
+
+        Args:
+            threshold: Minimum cosine similarity to the best prototype
+        """
+        self.threshold = threshold if threshold is not None else settings.intent_classifier_threshold
+        self.intents = [intent for intent, phrases in INTENT_PROTOTYPES.items() for _ in phrases]
+        self._embedder = None
+        self._prototypes = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _embed(self, texts) -> np.ndarray:
+        """Embed texts as unit-length float32 rows."""
+        vectors = np.asarray(self._embedder(list(texts)), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+    def _load(self) -> bool:
+        """Load the embedder and embed the prototypes on first use."""
+        with self._lock:
+            if self._prototypes is None and not self._disabled:
+                try:
+                    # Imported on first use; chromadb is slow to import
+                    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+                    self._embedder = DefaultEmbeddingFunction()
+                    self._prototypes = np.ascontiguousarray(self._embed(
+                        phrase for phrases in INTENT_PROTOTYPES.values() for phrase in phrases
+                    ))
+                except Exception as e:
+                    logger.warning(f"Intent classifier unavailable: {e}")
+                    self._disabled = True
+        return self._prototypes is not None
+
+    def classify(self, query: str) -> frozenset:
+        """
+        Classify a query by its closest intent prototype.
+
+        Args:
+            query: The customer's message
+
+        Returns:
+            frozenset: The matched intent, or an empty set below the threshold
+        """
+        if not self._load():
+            return frozenset()
+
+        try:
+            scores = self._prototypes @ self._embed([query])[0]
+        except Exception as e:
+            logger.warning(f"Intent classification failed: {e}")
+            return frozenset()
+
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return frozenset()
+        logger.debug(f"Classified intent {self.intents[best]} (similarity {scores[best]:.3f})")
+        return frozenset((self.intents[best],))
+
+
+# Global intent classifier instance
+_intent_classifier = None
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """
+    Get or create the global intent classifier instance.
+
+    Returns:
+        IntentClassifier: The intent classifier instance
+    """
+    global _intent_classifier
+    if _intent_classifier is None:
+        _intent_classifier = IntentClassifier()
+    return _intent_classifier
@@ -1,9 +1,145 @@
 """LLM engine wrapper for Ollama local models."""
 
-from typing import Optional
+import asyncio
+import weakref
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+import httpx
 from langchain_ollama import ChatOllama
 
 from app.utils.config import settings
+from app.utils.logging_config import logger
+
+
+class BatchingLLM:
+    """
+    Coalesces concurrent ainvoke calls into a single abatch call.
+    
+    Calls arriving within max_batch_delay_ms of each other (up to
+    max_batch_size) are sent together; each caller still awaits its own
+    result. Each event loop gets its own queue and collector task, so sync
+    run() calls on different threads batch independently. Every other attribute (stream, astream, invoke, ...) is passed
+    straight through to the wrapped model.
+    """
+    
+    def __init__(self, llm, max_batch_size: int = 8, max_batch_delay_ms: int = 20):
+        """
+        Initialize the batching wrapper.
+        
+        Args:
+            llm: LangChain chat model to wrap
+            max_batch_size: Maximum number of calls sent in one batch
+            max_batch_delay_ms: Longest time the first call in a batch waits for company
+        """
+        self.llm = llm
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay_ms / 1000
+        # Event loop -> call queue drained by that loop's collector task
+        self._queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Queue]" = weakref.WeakKeyDictionary()
+        self._queues_lock = threading.Lock()
+        self._in_flight = set()  # Keeps dispatched batch tasks alive
+        self._fill_ratios = deque(maxlen=1000)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+    
+    async def ainvoke(self, input, config=None, **kwargs):
+        """
+        Invoke the model, batched with other calls arriving at the same time.
+        
+        Calls with a config or extra kwargs bypass batching.
+        """
+        if config is not None or kwargs:
+            return await self.llm.ainvoke(input, config, **kwargs)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._get_queue(loop).put((input, future))
+        return await future
+    
+    def _get_queue(self, loop: asyncio.AbstractEventLoop) -> asyncio.Queue:
+        """Get this event loop's call queue, starting its collector on first use."""
+        with self._queues_lock:
+            queue = self._queues.get(loop)
+            if queue is None:
+                queue = self._queues[loop] = asyncio.Queue()
+                worker = loop.create_task(self._collect_batches(queue))
+                # The collector is cancelled when its loop shuts down (e.g. at the
+                # end of each asyncio.run in the sync path); forget the queue then
+                worker.add_done_callback(lambda _: self._forget_queue(loop, queue))
+            return queue
+    
+    def _forget_queue(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> None:
+        """Drop a loop's queue once its collector has stopped."""
+        with self._queues_lock:
+            if self._queues.get(loop) is queue:
+                del self._queues[loop]
+    
+    async def _collect_batches(self, queue: asyncio.Queue):
+        """Gather queued calls into batches and dispatch each without waiting on it."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_batch_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            task = loop.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+    
+    async def _dispatch(self, batch: list):
+        """Send one batch to the model and resolve each caller's future."""
+        self._record_fill(len(batch))
+        try:
+            results = await self.llm.abatch([item for item, _ in batch], return_exceptions=True)
+        except Exception as e:
+            results = [e] * len(batch)
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # Caller was cancelled
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    def _record_fill(self, size: int):
+        """Track how full batches are, logging a summary every 100 batches."""
+        self._fill_ratios.append(size / self.max_batch_size)
+        if len(self._fill_ratios) % 100 == 0:
+            stats = self.batch_stats()
+            logger.info(f"LLM batch fill ratio p50={stats['fill_p50']:.2f} p99={stats['fill_p99']:.2f}")
+    
+    def batch_stats(self) -> Dict[str, float]:
+        """
+        Get fill ratio percentiles over the most recent batches.
+        
+        Returns:
+            Dict with batch count and p50/p99 fill ratio (batch size / max_batch_size)
+        """
+        ratios = sorted(self._fill_ratios)
+        if not ratios:
+            return {"batches": 0, "fill_p50": 0.0, "fill_p99": 0.0}
+        return {
+            "batches": len(ratios),
+            "fill_p50": ratios[len(ratios) // 2],
+            "fill_p99": ratios[min(len(ratios) - 1, int(len(ratios) * 0.99))],
+        }
+
+
+# ChatOllama clients by model name, shared by every LLMEngine so their
+# HTTP connections to Ollama are reused across calls
+_LLM_CACHE: Dict[str, ChatOllama] = {}
+_LLM_CACHE_LOCK = threading.Lock()
 
 
 class LLMEngine:
@@ -28,11 +164,18 @@ class LLMEngine:
             ChatOllama: LangChain-compatible Ollama chat model
         """
         if self._llm is None:
-            self._llm = ChatOllama(
-                model=self.model_name,
-                base_url=self.base_url,
-                temperature=0.7,
-            )
+            with _LLM_CACHE_LOCK:
+                if self.model_name not in _LLM_CACHE:
+                    _LLM_CACHE[self.model_name] = ChatOllama(
+                        model=self.model_name,
+                        base_url=self.base_url,
+                        temperature=0.7,
+                        # Keep enough connections alive for a full batch of concurrent calls
+                        client_kwargs={"limits": httpx.Limits(
+                            max_keepalive_connections=settings.llm_max_batch_size
+                        )},
+                    )
+                self._llm = _LLM_CACHE[self.model_name]
         return self._llm
     
     def invoke(self, prompt: str) -> str:
@@ -50,7 +193,11 @@ class LLMEngine:
         return response.content if hasattr(response, 'content') else str(response)
 
 
-# Global LLM engine instance
+# Batching LLMs by model name, shared so concurrent agents fill the same batches
+_batching_llms: Dict[str, BatchingLLM] = {}
+_batching_llms_lock = threading.Lock()
+
+
 def get_llm(model_name: Optional[str] = None):
     """
     Factory function to get an LLM instance.
@@ -59,10 +206,21 @@ def get_llm(model_name: Optional[str] = None):
         model_name: Optional model name override
         
     Returns:
-        ChatOllama: LangChain-compatible Ollama model
+        BatchingLLM: Batching wrapper around a LangChain-compatible Ollama model
     """
-    engine = LLMEngine(model_name=model_name)
-    return engine.get_llm()
+    # Keyed by the resolved name so get_llm() and get_llm(settings.model_name) share batches
+    model_name = model_name or settings.model_name
+    llm = _batching_llms.get(model_name)
+    if llm is None:
+        with _batching_llms_lock:
+            if model_name not in _batching_llms:
+                _batching_llms[model_name] = BatchingLLM(
+                    LLMEngine(model_name=model_name).get_llm(),
+                    max_batch_size=settings.llm_max_batch_size,
+                    max_batch_delay_ms=settings.llm_max_batch_delay_ms,
+                )
+            llm = _batching_llms[model_name]
+    return llm
 
 
 if __name__ == "__main__":
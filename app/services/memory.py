@@ -1,10 +1,131 @@
 """Conversation memory service for maintaining chat history."""
 
+import time
+import queue
 import sqlite3
+import threading
+from collections import namedtuple
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
-from app.services.database import get_db_connection
+from app.services.database import db_conn, transaction
+from app.utils.logging_config import logger
+
+# Write-behind buffer: messages are queued by add_message and inserted in
+# batches of up to _MAX_BATCH_SIZE, at most _MAX_BATCH_DELAY seconds later
+_MAX_BATCH_SIZE = 50
+_MAX_BATCH_DELAY = 0.1
+_MESSAGE_Q: "queue.Queue[tuple]" = queue.Queue()
+
+# Queued messages not yet committed, by session, so reads still see them.
+# A batch stays here until its write has finished (or failed).
+_pending: Dict[str, List[Dict[str, str]]] = {}
+_pending_lock = threading.Lock()
+# While a batch is being written: the highest row ID before it. Rows above
+# it may also still be in _pending, so readers skip them. _write_seq counts
+# batches started, so a reader can tell one began during its read.
+_write_floor: Optional[int] = None
+_write_seq = 0
+
+# SQL is kept in module constants so every call passes the same statement
+# text and hits the connection's prepared-statement cache
+_INSERT_MESSAGES_SQL = """
+    INSERT INTO conversation_history (session_id, role, content, timestamp)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Latest messages of a session in chronological order, via an index range
+# scan; a LIMIT of -1 means no limit
+_HISTORY_SQL = """
+    SELECT id, role, content, timestamp
+    FROM (
+        SELECT id, role, content, timestamp
+        FROM conversation_history
+        WHERE session_id = ?
+        ORDER BY timestamp DESC, id DESC
+        LIMIT ?
+    )
+    ORDER BY timestamp, id
+"""
+
+_MAX_MESSAGE_ID_SQL = "SELECT COALESCE(MAX(id), 0) FROM conversation_history"
+
+_CLEAR_HISTORY_SQL = """
+    DELETE FROM conversation_history
+    WHERE session_id = ?
+"""
+
+# Most recently active sessions, skipping those idle since before the given time
+_SESSIONS_SQL = """
+    SELECT 
+        session_id,
+        COUNT(*) as message_count,
+        MIN(timestamp) as started_at,
+        MAX(timestamp) as last_activity
+    FROM conversation_history
+    GROUP BY session_id
+    HAVING last_activity >= ?
+    ORDER BY last_activity DESC
+    LIMIT ?
+"""
+
+
+def _write_messages(batch: List[tuple]) -> None:
+    """
+    Insert a batch of (session_id, role, content, timestamp) rows in one transaction.
+    
+    _pending_lock is only taken around the bookkeeping, never while waiting
+    on the database. The batch leaves _pending whether or not the insert
+    succeeds, so a failed batch is not served from memory forever.
+    """
+    global _write_floor, _write_seq
+    try:
+        with transaction() as conn:
+            # Holding the write lock, so the batch's rows will all be above this
+            floor = conn.execute(_MAX_MESSAGE_ID_SQL).fetchone()[0]
+            with _pending_lock:
+                _write_floor = floor
+                _write_seq += 1
+            conn.executemany(_INSERT_MESSAGES_SQL, batch)
+    finally:
+        with _pending_lock:
+            for session_id, *_ in batch:
+                messages = _pending[session_id]
+                messages.pop(0)
+                if not messages:
+                    del _pending[session_id]
+            _write_floor = None
+
+
+def _message_writer() -> None:
+    """Drain queued messages into the database on a background thread."""
+    while True:
+        batch = [_MESSAGE_Q.get()]
+        deadline = time.monotonic() + _MAX_BATCH_DELAY
+        while len(batch) < _MAX_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_MESSAGE_Q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            _write_messages(batch)
+        except Exception:
+            logger.exception(f"Failed to write {len(batch)} conversation messages")
+        finally:
+            for _ in batch:
+                _MESSAGE_Q.task_done()
+
+
+threading.Thread(target=_message_writer, name="memory-writer", daemon=True).start()
+
+
+def flush_messages() -> None:
+    """Block until every queued message has been written (e.g. on shutdown)."""
+    _MESSAGE_Q.join()
 
 
 class ConversationMemory:
@@ -23,20 +144,24 @@ class ConversationMemory:
         """
         Add a message to conversation history.
         
+        The message is visible to get_history immediately and written to
+        the database in the background; call flush() to wait for the write.
+        
         Args:
             role: 'user' or 'assistant'
             content: Message content
         """
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO conversation_history (session_id, role, content)
-            VALUES (?, ?, ?)
-        """, (self.session_id, role, content))
-        
-        conn.commit()
-        conn.close()
+        # Same format as SQLite's CURRENT_TIMESTAMP, taken now rather than at write time
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        with _pending_lock:
+            _pending.setdefault(self.session_id, []).append(
+                {"role": role, "content": content, "timestamp": timestamp}
+            )
+            _MESSAGE_Q.put((self.session_id, role, content, timestamp))
+    
+    def flush(self) -> None:
+        """Block until buffered messages have been written to the database."""
+        flush_messages()
     
     def get_history(self, limit: Optional[int] = 10) -> List[Dict[str, str]]:
         """
@@ -48,34 +173,37 @@ class ConversationMemory:
         Returns:
             List of message dictionaries with role, content, timestamp
         """
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT role, content, timestamp
-            FROM conversation_history
-            WHERE session_id = ?
-            ORDER BY timestamp DESC
-        """
-        
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        cursor.execute(query, (self.session_id,))
-        rows = cursor.fetchall()
-        conn.close()
+        # Snapshot the not-yet-written messages, then read the table without
+        # holding the lock. Rows of a batch being written are skipped (they
+        # are in the snapshot); if a batch started during the read, retry.
+        while True:
+            with _pending_lock:
+                pending = list(_pending.get(self.session_id, ()))
+                floor = _write_floor
+                seq = _write_seq
+            
+            with db_conn() as conn:
+                rows = conn.execute(_HISTORY_SQL, (self.session_id, limit or -1)).fetchall()
+            
+            if floor is not None:
+                break
+            with _pending_lock:
+                if _write_seq == seq:
+                    break
         
-        # Return in chronological order (oldest first)
+        # Rows come back oldest first; buffered messages are the newest
         messages = [
             {
                 "role": row["role"],
                 "content": row["content"],
                 "timestamp": row["timestamp"]
             }
-            for row in reversed(rows)
+            for row in rows
+            if floor is None or row["id"] <= floor
         ]
+        messages.extend(pending)
         
-        return messages
+        return messages[-limit:] if limit else messages
     
     def get_context_string(self, limit: Optional[int] = 5) -> str:
         """
@@ -101,50 +229,37 @@ class ConversationMemory:
     
     def clear_history(self) -> None:
         """Clear conversation history for the session."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            DELETE FROM conversation_history
-            WHERE session_id = ?
-        """, (self.session_id,))
-        
-        conn.commit()
-        conn.close()
+        flush_messages()
+        with transaction() as conn:
+            conn.execute(_CLEAR_HISTORY_SQL, (self.session_id,))
+
+
+# One row of get_all_sessions(); use ._asdict() where a dict is needed
+SessionRow = namedtuple("SessionRow", "session_id message_count started_at last_activity")
 
 
-def get_all_sessions() -> List[Dict[str, any]]:
+def get_all_sessions(
+    since: Optional[datetime] = None,
+    limit: int = 100,
+    conn: Optional[sqlite3.Connection] = None
+) -> List[SessionRow]:
     """
-    Get all conversation sessions with message counts.
+    Get the most recently active conversation sessions with message counts.
+    
+    Args:
+        since: Only include sessions with activity at or after this time (UTC)
+        limit: Maximum number of sessions to return
+        conn: Optional connection to run the query on
     
     Returns:
-        List of session information dictionaries
+        List of SessionRow tuples, most recently active first
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT 
-            session_id,
-            COUNT(*) as message_count,
-            MIN(timestamp) as started_at,
-            MAX(timestamp) as last_activity
-        FROM conversation_history
-        GROUP BY session_id
-        ORDER BY last_activity DESC
-    """)
-    
-    rows = cursor.fetchall()
-    conn.close()
+    # Stored timestamps are UTC "YYYY-MM-DD HH:MM:SS" text; "" sorts before all of them
+    since_text = since.strftime("%Y-%m-%d %H:%M:%S") if since else ""
     
-    sessions = [
-        {
-            "session_id": row["session_id"],
-            "message_count": row["message_count"],
-            "started_at": row["started_at"],
-            "last_activity": row["last_activity"]
-        }
-        for row in rows
-    ]
+    flush_messages()
+    with db_conn(conn) as conn:
+        cursor = conn.execute(_SESSIONS_SQL, (since_text, limit))
+        sessions = [SessionRow._make(row) for row in cursor]
     
     return sessions
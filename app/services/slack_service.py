@@ -1,34 +1,385 @@
 """Slack notification service for customer support alerts."""
 
 import os
-from typing import Optional
-from slack_sdk import WebClient
+import re
+import time
+import atexit
+import asyncio
+import threading
+from concurrent.futures import Future, wait
+from functools import lru_cache
+from typing import Dict, Optional, Set
+
+import aiohttp
 from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_async_handlers import (
+    AsyncConnectionErrorRetryHandler,
+    AsyncRateLimitErrorRetryHandler,
+    AsyncServerErrorRetryHandler,
+)
+from slack_sdk.web.async_client import AsyncWebClient
 from app.utils.config import settings
+from app.utils.logging_config import logger
+
+# How long resolved channel IDs are trusted before the channel list is refetched
+_CHANNEL_CACHE_TTL = 600.0
+_CHANNEL_ID_RE = re.compile(r"^[CGD][A-Z0-9]{6,}$")
+
+# chat.postMessage allows about one message per second per channel, with short bursts
+_POST_RATE_PER_SEC = 1.0
+_POST_BURST = 5.0
+
+# After the token is rejected, posts are dropped for this long before
+# auth.test is tried again
+_AUTH_RETRY_AFTER = 300.0
+_AUTH_ERRORS = frozenset({"invalid_auth", "account_inactive", "token_revoked", "not_authed"})
+
+# Refund notifications are informational, so those arriving close together
+# are combined into one message per channel
+_REFUND_BATCH_MAX_SIZE = 10
+_REFUND_BATCH_MAX_AGE = 2.0
+_REFUND_BATCH_POLL_INTERVAL = 1.0
+
+
+def _header(text: str) -> dict:
+    return {"type": "header", "text": {"type": "plain_text", "text": text, "emoji": True}}
+
+
+def _context(text: str) -> dict:
+    return {"type": "context", "elements": [{"type": "mrkdwn", "text": text}]}
+
+
+def _field(text: str) -> dict:
+    return {"type": "mrkdwn", "text": text}
+
+
+# Currency code -> display symbol; anything else is shown with '$'
+_CURRENCY_SYMBOLS = {"INR": "₹"}
+
+
+@lru_cache(maxsize=4096)
+def _fmt_money(amount: float, currency: str = "") -> str:
+    """Format an amount for display, e.g. '$49.99 USD' (or '$49.99' with no currency)."""
+    return f"{_CURRENCY_SYMBOLS.get(currency, '$')}{amount:.2f} {currency}".rstrip()
+
+
+# Static Block Kit blocks, built once and shared by every message. They are
+# only ever serialized, never mutated.
+_REFUND_HEADER_BLOCK = _header("💰 Refund Processed")
+_REFUND_CONTEXT_BLOCK = _context("✅ Automated refund processed by AI Agent")
+_DIVIDER_BLOCK = {"type": "divider"}
+
+_HIGH_VALUE_HEADER_BLOCK = _header("🚨 High-Value Refund Request")
+_HIGH_VALUE_CONTEXT_BLOCK = _context("⏰ Expected response time: Within 4 hours")
+
+_TICKET_HEADER_BLOCK = _header("🎫 New Support Ticket")
+_PRIORITY_EMOJI = {"low": "🔵", "medium": "🟡", "high": "🔴"}
+
+_REPLACEMENT_HEADER_BLOCK = _header("🔄 Product Replacement Request")
+_REPLACEMENT_ACTION_BLOCK = {
+    "type": "section",
+    "text": _field(
+        "⚠️ *Action Required:* Please review and arrange replacement:\n"
+        "• Verify defect/issue\n• Arrange pickup (if needed)\n"
+        "• Ship replacement product\n• Update customer with tracking"
+    )
+}
+_REPLACEMENT_CONTEXT_BLOCK = _context("🚨 HIGH PRIORITY | ⏰ Response expected within 4 hours")
 
 
 class SlackService:
-    """Service for sending notifications to Slack channels."""
+    """
+    Service for sending notifications to Slack channels.
+    
+    Messages are posted with an AsyncWebClient on a dedicated event loop
+    thread, so any number of in-flight posts share one thread and one
+    keep-alive connection pool. The send_* methods stay synchronous for the
+    tools that call them: they schedule the post and return immediately.
+    """
     
     def __init__(self):
         """Initialize Slack client with bot token."""
         self.enabled = bool(settings.slack_token)
-        self.client = None
+        self.client: Optional[AsyncWebClient] = None
+        # Channel name -> (channel ID, time resolved)
+        self._channel_cache: Dict[str, tuple] = {}
+        self._channel_refresh_lock = asyncio.Lock()
+        # Channel -> (tokens, last refill time) for post rate limiting; only
+        # touched on the event loop
+        self._buckets: Dict[str, tuple] = {}
+        # Channel -> [(queued at, section block, fallback text)] awaiting a combined post
+        self._refund_batches: Dict[str, list] = {}
+        self._refund_batch_lock = threading.Lock()
+        # While set, the token was rejected and posts are skipped until then
+        self._auth_failed_until = 0.0
+        # Posts scheduled on the loop and not yet finished. Added to by
+        # callers' threads and removed from on the loop thread, so guarded;
+        # the lock also covers _loop being cleared by close().
+        self._in_flight: Set[Future] = set()
+        self._in_flight_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
         if self.enabled:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="slack-loop", daemon=True).start()
+            atexit.register(self.close)
             try:
-                self.client = WebClient(token=settings.slack_token)
-                # Test the connection
-                self.client.auth_test()
-                print("✅ Slack service initialized successfully")
+                self._run(self._open_client()).result()
+                logger.info("Slack service initialized")
             except SlackApiError as e:
-                print(f"⚠️  Slack initialization failed: {e.response['error']}")
+                logger.warning("Slack initialization failed: %s", e.response["error"])
                 self.enabled = False
+                self.invalidate_channel_cache()
             except Exception as e:
-                print(f"⚠️  Slack service disabled: {e}")
+                logger.warning("Slack service disabled: %s", e)
                 self.enabled = False
+                self.invalidate_channel_cache()
         else:
-            print("ℹ️  Slack service is disabled (no token provided)")
+            logger.info("Slack service is disabled (no token provided)")
+    
+    def _run(self, coro) -> Optional[Future]:
+        """
+        Schedule a coroutine on the Slack event loop from any thread.
+        
+        Returns:
+            Optional[Future]: The coroutine's future, or None if the service
+            has been closed (the coroutine is dropped)
+        """
+        with self._in_flight_lock:
+            if self._loop is None:
+                coro.close()
+                logger.debug("Slack service is closed. Dropping notification.")
+                return None
+            future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+            self._in_flight.add(future)
+        future.add_done_callback(self._finished)
+        return future
+    
+    def _finished(self, future: Future) -> None:
+        """Forget a completed post (runs on the loop thread)."""
+        with self._in_flight_lock:
+            self._in_flight.discard(future)
+    
+    async def _open_client(self) -> None:
+        """Create the client and its HTTP session on the loop, then test the token."""
+        # aiohttp sessions belong to the loop they are created on
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=60)
+        )
+        self.client = AsyncWebClient(
+            token=settings.slack_token,
+            session=session,
+            # Retry transient failures with exponential backoff instead of
+            # dropping the notification; 429s wait out Retry-After. Most
+            # 429s are avoided up front by the per-channel token bucket.
+            retry_handlers=[
+                AsyncConnectionErrorRetryHandler(max_retry_count=2),
+                AsyncRateLimitErrorRetryHandler(max_retry_count=3),
+                AsyncServerErrorRetryHandler(max_retry_count=2),
+            ]
+        )
+        # Test the connection
+        await self.client.auth_test()
+        asyncio.get_running_loop().create_task(self._refund_batch_worker())
+    
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Post pending refund batches, wait for in-flight posts, and shut the
+        event loop down (registered with atexit).
+        
+        Args:
+            timeout: Seconds to wait for outstanding posts
+        """
+        if self._loop is None:
+            return
+        # Later send_* calls (e.g. requests finishing during shutdown) return False
+        self.enabled = False
+        self.flush_refund_batches()
+        with self._in_flight_lock:
+            in_flight = list(self._in_flight)
+        wait(in_flight, timeout=timeout)
+        if self.client is not None and self.client.session is not None:
+            closing = self._run(self.client.session.close())
+            if closing is not None:
+                closing.result(timeout=timeout)
+        with self._in_flight_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+    
+    def invalidate_channel_cache(self) -> None:
+        """Forget resolved channel IDs, e.g. after a token or workspace change."""
+        self._channel_cache = {}
+    
+    async def _resolve_channel(self, name: str) -> str:
+        """
+        Resolve a channel name to its ID, refreshing the cached channel list
+        when the entry is missing or older than the TTL.
+        
+        Args:
+            name: Channel name (with or without '#') or channel ID
+            
+        Returns:
+            str: The channel ID, or the name unchanged if it can't be resolved
+        """
+        name = name.lstrip("#")
+        if _CHANNEL_ID_RE.match(name):
+            return name
+        
+        async with self._channel_refresh_lock:
+            # Another post may have refreshed the list while this one waited
+            cached = self._channel_cache.get(name)
+            if cached and time.monotonic() - cached[1] < _CHANNEL_CACHE_TTL:
+                return cached[0]
+            
+            try:
+                channels = {}
+                cursor = None
+                while True:
+                    response = await self.client.conversations_list(
+                        limit=1000,
+                        exclude_archived=True,
+                        cursor=cursor
+                    )
+                    for channel in response["channels"]:
+                        channels[channel["name"]] = channel["id"]
+                    cursor = response.get("response_metadata", {}).get("next_cursor")
+                    if not cursor:
+                        break
+            except Exception as e:
+                # Slack accepts channel names too; just skip the cache
+                logger.warning("Could not resolve Slack channel %r: %s", name, e)
+                return cached[0] if cached else name
+            
+            now = time.monotonic()
+            self._channel_cache = {channel_name: (channel_id, now) for channel_name, channel_id in channels.items()}
+            return channels.get(name, name)
+    
+    async def _acquire_post_slot(self, channel: str) -> None:
+        """
+        Wait for a token from the channel's bucket so bursts are spread out
+        instead of tripping Slack's rate limit and its 429 retries.
+        
+        Args:
+            channel: Channel being posted to
+        """
+        now = time.monotonic()
+        tokens, last = self._buckets.get(channel, (_POST_BURST, now))
+        tokens = min(_POST_BURST, tokens + (now - last) * _POST_RATE_PER_SEC) - 1
+        self._buckets[channel] = (tokens, now)
+        
+        # A negative balance is a reservation; wait until it is paid back
+        if tokens < 0:
+            await asyncio.sleep(-tokens / _POST_RATE_PER_SEC)
+    
+    def _queue_refund(self, channel: str, section: dict, text: str) -> None:
+        """Add a refund section to the channel's batch."""
+        with self._refund_batch_lock:
+            batch = self._refund_batches.setdefault(channel, [])
+            batch.append((time.monotonic(), section, text))
+            full = len(batch) >= _REFUND_BATCH_MAX_SIZE
+        if full:
+            self.flush_refund_batches(channel)
+    
+    async def _refund_batch_worker(self) -> None:
+        """Post refund batches once their oldest entry is old enough."""
+        while True:
+            await asyncio.sleep(_REFUND_BATCH_POLL_INTERVAL)
+            cutoff = time.monotonic() - _REFUND_BATCH_MAX_AGE
+            with self._refund_batch_lock:
+                due = [channel for channel, batch in self._refund_batches.items() if batch[0][0] <= cutoff]
+            for channel in due:
+                self.flush_refund_batches(channel)
+    
+    def flush_refund_batches(self, channel: Optional[str] = None) -> None:
+        """
+        Post pending refund notifications now, one message per channel.
+        
+        Args:
+            channel: Only flush this channel (default: all channels)
+        """
+        with self._refund_batch_lock:
+            if channel is None:
+                batches, self._refund_batches = self._refund_batches, {}
+            else:
+                batches = {channel: self._refund_batches.pop(channel, [])}
+        
+        for channel, batch in batches.items():
+            if not batch:
+                continue
+            if len(batch) == 1:
+                header = _REFUND_HEADER_BLOCK
+                sections = [batch[0][1]]
+            else:
+                header = _header(f"💰 {len(batch)} Refunds Processed")
+                sections = []
+                for _, section, _ in batch:
+                    sections += [section, _DIVIDER_BLOCK]
+                sections.pop()
+            self._run(self._post(
+                channel,
+                [header, *sections, _REFUND_CONTEXT_BLOCK],
+                "\n".join(text for _, _, text in batch)
+            ))
+    
+    async def _check_auth(self) -> bool:
+        """
+        Return whether posting is allowed, re-testing a rejected token with
+        auth.test once its back-off window has passed.
+        """
+        if not self._auth_failed_until:
+            return True
+        now = time.monotonic()
+        if now < self._auth_failed_until:
+            return False
+        
+        # Hold other posts back while this one probes
+        self._auth_failed_until = now + _AUTH_RETRY_AFTER
+        try:
+            await self.client.auth_test()
+        except Exception as e:
+            logger.warning("Slack token still rejected, skipping posts for %.0fs: %s", _AUTH_RETRY_AFTER, e)
+            return False
+        logger.info("Slack token accepted again; resuming notifications")
+        self._auth_failed_until = 0.0
+        return True
+    
+    async def _post(self, channel: str, blocks: list, text: str) -> bool:
+        """
+        Post a message to a Slack channel. Runs on the Slack event loop.
+        
+        Args:
+            channel: Slack channel to post to
+            blocks: Block Kit message blocks
+            text: Plain-text fallback for notifications
+            
+        Returns:
+            bool: True if sent successfully, False otherwise
+        """
+        if not await self._check_auth():
+            return False
+        
+        try:
+            channel_id = await self._resolve_channel(channel)
+            await self._acquire_post_slot(channel_id)
+            await self.client.chat_postMessage(channel=channel_id, blocks=blocks, text=text)
+            logger.debug("Slack notification sent to %s", channel)
+            return True
+        except SlackApiError as e:
+            error = e.response["error"]
+            if error in _AUTH_ERRORS:
+                if not self._auth_failed_until:
+                    logger.error("Slack token rejected (%s); skipping posts for %.0fs", error, _AUTH_RETRY_AFTER)
+                self._auth_failed_until = time.monotonic() + _AUTH_RETRY_AFTER
+                self.invalidate_channel_cache()
+                return False
+            if error == "channel_not_found":
+                self.invalidate_channel_cache()
+            logger.error("Slack API error: %s", error)
+            return False
+        except Exception as e:
+            logger.error("Failed to send Slack notification: %s", e)
+            return False
     
     def send_refund_notification(
         self,
@@ -42,6 +393,9 @@ class SlackService:
         """
         Send refund notification to Slack channel.
         
+        Refunds are batched: notifications for the same channel within a
+        couple of seconds are posted together as one message.
+        
         Args:
             order_id: The order ID
             customer_email: Customer's email address
@@ -51,75 +405,31 @@ class SlackService:
             channel: Slack channel to post to (default: #refunds)
             
         Returns:
-            bool: True if sent successfully, False otherwise
+            bool: True once the post is queued (not delivered; delivery
+                failures are logged), False if Slack is disabled
         """
         if not self.enabled:
-            print("Slack service is disabled. Skipping notification.")
+            logger.debug("Slack service is disabled. Skipping notification.")
             return False
         
         # Use default channel if none provided
         if not channel:
             channel = settings.slack_channel
         
-        try:
-            symbol = "₹" if currency == "INR" else "$"
-            
-            message_blocks = [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "💰 Refund Processed",
-                        "emoji": True
-                    }
-                },
-                {
-                    "type": "section",
-                    "fields": [
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Order ID:*\n{order_id}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Amount:*\n{symbol}{refund_amount:.2f} {currency}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Customer:*\n{customer_email}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Refund ID:*\n`{refund_id}`"
-                        }
-                    ]
-                },
-                {
-                    "type": "context",
-                    "elements": [
-                        {
-                            "type": "mrkdwn",
-                            "text": f"✅ Automated refund processed by AI Agent"
-                        }
-                    ]
-                }
+        amount = _fmt_money(refund_amount, currency)
+        
+        section = {
+            "type": "section",
+            "fields": [
+                _field(f"*Order ID:*\n{order_id}"),
+                _field(f"*Amount:*\n{amount}"),
+                _field(f"*Customer:*\n{customer_email}"),
+                _field(f"*Refund ID:*\n`{refund_id}`")
             ]
-            
-            self.client.chat_postMessage(
-                channel=channel,
-                blocks=message_blocks,
-                text=f"Refund processed: {order_id} - {symbol}{refund_amount:.2f} {currency}"
-            )
-            
-            print(f"✅ Slack notification sent to {channel}")
-            return True
-            
-        except SlackApiError as e:
-            print(f"❌ Slack API error: {e.response['error']}")
-            return False
-        except Exception as e:
-            print(f"❌ Failed to send Slack notification: {str(e)}")
-            return False
+        }
+        
+        self._queue_refund(channel, section, f"Refund processed: {order_id} - {amount}")
+        return True
     
     def send_high_value_refund_alert(
         self,
@@ -142,82 +452,43 @@ class SlackService:
             channel: Slack channel to post to
             
         Returns:
-            bool: True if sent successfully, False otherwise
+            bool: True once the post is queued (not delivered; delivery
+                failures are logged), False if Slack is disabled
         """
         if not self.enabled:
-            print("Slack service is disabled. Skipping alert.")
+            logger.debug("Slack service is disabled. Skipping alert.")
             return False
         
         # Use default channel if none provided
         if not channel:
             channel = settings.slack_channel
         
-        try:
-            symbol = "₹" if currency == "INR" else "$"
-            
-            message_blocks = [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "🚨 High-Value Refund Request",
-                        "emoji": True
-                    }
-                },
-                {
-                    "type": "section",
-                    "fields": [
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Order ID:*\n{order_id}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Amount:*\n{symbol}{refund_amount:.2f} {currency}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Customer:*\n{customer_email}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Ticket ID:*\n{ticket_id}"
-                        }
-                    ]
-                },
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"⚠️ *Action Required:* This refund exceeds the automated limit and requires manual approval.\n\n👉 Review ticket: `{ticket_id}`"
-                    }
-                },
-                {
-                    "type": "context",
-                    "elements": [
-                        {
-                            "type": "mrkdwn",
-                            "text": "⏰ Expected response time: Within 4 hours"
-                        }
-                    ]
-                }
-            ]
-            
-            self.client.chat_postMessage(
-                channel=channel,
-                blocks=message_blocks,
-                text=f"High-value refund request: {order_id} - {symbol}{refund_amount:.2f} {currency}"
-            )
-            
-            print(f"✅ High-value refund alert sent to {channel}")
-            return True
-            
-        except SlackApiError as e:
-            print(f"❌ Slack API error: {e.response['error']}")
-            return False
-        except Exception as e:
-            print(f"❌ Failed to send Slack alert: {str(e)}")
-            return False
+        amount = _fmt_money(refund_amount, currency)
+        
+        message_blocks = [
+            _HIGH_VALUE_HEADER_BLOCK,
+            {
+                "type": "section",
+                "fields": [
+                    _field(f"*Order ID:*\n{order_id}"),
+                    _field(f"*Amount:*\n{amount}"),
+                    _field(f"*Customer:*\n{customer_email}"),
+                    _field(f"*Ticket ID:*\n{ticket_id}")
+                ]
+            },
+            {
+                "type": "section",
+                "text": _field(f"⚠️ *Action Required:* This refund exceeds the automated limit and requires manual approval.\n\n👉 Review ticket: `{ticket_id}`")
+            },
+            _HIGH_VALUE_CONTEXT_BLOCK
+        ]
+        
+        self._run(self._post(
+            channel,
+            message_blocks,
+            f"High-value refund request: {order_id} - {amount}"
+        ))
+        return True
     
     def send_support_ticket_notification(
         self,
@@ -240,84 +511,47 @@ class SlackService:
             channel: Slack channel to post to
             
         Returns:
-            bool: True if sent successfully, False otherwise
+            bool: True once the post is queued (not delivered; delivery
+                failures are logged), False if Slack is disabled
         """
         if not self.enabled:
-            print("Slack service is disabled. Skipping notification.")
+            logger.debug("Slack service is disabled. Skipping notification.")
             return False
         
         # Use default channel if none provided
         if not channel:
             channel = settings.slack_channel
         
-        try:
-            # Determine emoji and color based on priority
-            priority_config = {
-                "low": {"emoji": "🔵", "color": "#36a64f"},
-                "medium": {"emoji": "🟡", "color": "#ff9900"},
-                "high": {"emoji": "🔴", "color": "#ff0000"}
+        emoji = _PRIORITY_EMOJI.get(priority.lower(), _PRIORITY_EMOJI["medium"])
+        
+        ticket_field = _field(f"*Ticket ID:*\n{ticket_id}")
+        priority_field = _field(f"*Priority:*\n{emoji} {priority.upper()}")
+        customer_field = _field(f"*Customer:*\n{customer_email}")
+        # Built in its final shape rather than appended to
+        fields = (
+            [ticket_field, priority_field, customer_field, _field(f"*Order ID:*\n{order_id}")]
+            if order_id else
+            [ticket_field, priority_field, customer_field]
+        )
+        
+        message_blocks = [
+            _TICKET_HEADER_BLOCK,
+            {
+                "type": "section",
+                "fields": fields
+            },
+            {
+                "type": "section",
+                "text": _field(f"*Issue:*\n{issue[:500]}")  # Limit to 500 chars
             }
-            
-            config = priority_config.get(priority.lower(), priority_config["medium"])
-            
-            fields = [
-                {
-                    "type": "mrkdwn",
-                    "text": f"*Ticket ID:*\n{ticket_id}"
-                },
-                {
-                    "type": "mrkdwn",
-                    "text": f"*Priority:*\n{config['emoji']} {priority.upper()}"
-                },
-                {
-                    "type": "mrkdwn",
-                    "text": f"*Customer:*\n{customer_email}"
-                }
-            ]
-            
-            if order_id:
-                fields.append({
-                    "type": "mrkdwn",
-                    "text": f"*Order ID:*\n{order_id}"
-                })
-            
-            message_blocks = [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "🎫 New Support Ticket",
-                        "emoji": True
-                    }
-                },
-                {
-                    "type": "section",
-                    "fields": fields
-                },
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*Issue:*\n{issue[:500]}"  # Limit to 500 chars
-                    }
-                }
-            ]
-            
-            self.client.chat_postMessage(
-                channel=channel,
-                blocks=message_blocks,
-                text=f"New support ticket: {ticket_id} - {priority.upper()} priority"
-            )
-            
-            print(f"✅ Support ticket notification sent to {channel}")
-            return True
-            
-        except SlackApiError as e:
-            print(f"❌ Slack API error: {e.response['error']}")
-            return False
-        except Exception as e:
-            print(f"❌ Failed to send Slack notification: {str(e)}")
-            return False
+        ]
+        
+        self._run(self._post(
+            channel,
+            message_blocks,
+            f"New support ticket: {ticket_id} - {priority.upper()} priority"
+        ))
+        return True
     
     def send_replacement_request_notification(
         self,
@@ -342,88 +576,40 @@ class SlackService:
             channel: Slack channel to post to
             
         Returns:
-            bool: True if sent successfully, False otherwise
+            bool: True once the post is queued (not delivered; delivery
+                failures are logged), False if Slack is disabled
         """
         if not self.enabled:
-            print("Slack service is disabled. Skipping notification.")
+            logger.debug("Slack service is disabled. Skipping notification.")
             return False
         
         # Use default channel if none provided
         if not channel:
             channel = settings.slack_channel
         
-        try:
-            message_blocks = [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "🔄 Product Replacement Request",
-                        "emoji": True
-                    }
-                },
-                {
-                    "type": "section",
-                    "fields": [
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Ticket ID:*\n{ticket_id}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Order ID:*\n{order_id}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Product:*\n{product_name}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Amount:*\n${amount:.2f}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Reason:*\n{reason}"
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*Customer:*\n{customer_email}"
-                        }
-                    ]
-                },
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": "⚠️ *Action Required:* Please review and arrange replacement:\n• Verify defect/issue\n• Arrange pickup (if needed)\n• Ship replacement product\n• Update customer with tracking"
-                    }
-                },
-                {
-                    "type": "context",
-                    "elements": [
-                        {
-                            "type": "mrkdwn",
-                            "text": "🚨 HIGH PRIORITY | ⏰ Response expected within 4 hours"
-                        }
-                    ]
-                }
-            ]
-            
-            self.client.chat_postMessage(
-                channel=channel,
-                blocks=message_blocks,
-                text=f"Replacement request: {order_id} - {product_name} ({reason})"
-            )
-            
-            print(f"✅ Replacement request notification sent to {channel}")
-            return True
-            
-        except SlackApiError as e:
-            print(f"❌ Slack API error: {e.response['error']}")
-            return False
-        except Exception as e:
-            print(f"❌ Failed to send Slack notification: {str(e)}")
-            return False
+        message_blocks = [
+            _REPLACEMENT_HEADER_BLOCK,
+            {
+                "type": "section",
+                "fields": [
+                    _field(f"*Ticket ID:*\n{ticket_id}"),
+                    _field(f"*Order ID:*\n{order_id}"),
+                    _field(f"*Product:*\n{product_name}"),
+                    _field(f"*Amount:*\n{_fmt_money(amount)}"),
+                    _field(f"*Reason:*\n{reason}"),
+                    _field(f"*Customer:*\n{customer_email}")
+                ]
+            },
+            _REPLACEMENT_ACTION_BLOCK,
+            _REPLACEMENT_CONTEXT_BLOCK
+        ]
+        
+        self._run(self._post(
+            channel,
+            message_blocks,
+            f"Replacement request: {order_id} - {product_name} ({reason})"
+        ))
+        return True
 
 
 # Global Slack service instance
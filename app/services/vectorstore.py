@@ -1,11 +1,28 @@
 """Vector store service using Chroma for semantic search."""
 
+import queue
+import threading
+from concurrent.futures import Future
+from uuid import uuid4
 from typing import List, Optional
 from pathlib import Path
+import numpy as np
 import chromadb
 from chromadb.config import Settings as ChromaSettings
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
 
 from app.utils.config import settings
+from app.utils.logging_config import logger
+
+# Most queries coalesced into one collection.query call
+_MAX_QUERY_BATCH = 32
+
+# Documents embedded per collection.add call; the default embedding model
+# runs on padded batches, so one call per document wastes most of each pass
+_ADD_BATCH_SIZE = 64
+
+# Per-query result fields Chroma returns as one list per query text
+_RESULT_FIELDS = ("ids", "documents", "metadatas", "distances", "embeddings", "uris", "data")
 
 
 class VectorStoreService:
@@ -14,19 +31,53 @@ class VectorStoreService:
     def __init__(self):
         """Initialize the Chroma vector store."""
         self.persist_directory = Path(settings.vectorstore_path)
-        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        chroma_settings = ChromaSettings(anonymized_telemetry=False)
         
         # Initialize Chroma client
-        self.client = chromadb.PersistentClient(
-            path=str(self.persist_directory),
-            settings=ChromaSettings(
-                anonymized_telemetry=False,
+        if settings.chroma_host:
+            # One Chroma server holds the index for every worker process;
+            # the client keeps its HTTP connections alive between queries
+            self.client = chromadb.HttpClient(
+                host=settings.chroma_host,
+                port=settings.chroma_port,
+                settings=chroma_settings
             )
-        )
+        else:
+            self.persist_directory.mkdir(parents=True, exist_ok=True)
+            self.client = chromadb.PersistentClient(
+                path=str(self.persist_directory),
+                settings=chroma_settings
+            )
+        
+        # Queries are embedded here rather than inside Chroma so callers can
+        # reuse a query's embedding (e.g. for semantic cache lookups)
+        self.embedding_function = DefaultEmbeddingFunction()
+        # Bumped whenever documents are added, so cached search results can
+        # tell they were computed against an older index
+        self.generation = 0
         
         # Get or create default collection for FAQs
         self.collection_name = "faq_collection"
-        self.collection = None
+        self.collection = self.client.get_or_create_collection(
+            name=self.collection_name,
+            embedding_function=self.embedding_function
+        )
+        self._warm_up()
+        
+        # Queries are run by one background thread. Those that arrive while a
+        # batch is being embedded are sent together as the next batch.
+        self._query_queue: "queue.Queue[tuple]" = queue.Queue()
+        threading.Thread(target=self._query_worker, name="vectorstore-query", daemon=True).start()
+    
+    def _warm_up(self):
+        """
+        Run a throwaway query so the embedding model is loaded and the HNSW
+        index is paged in before the first real query needs them.
+        """
+        try:
+            self.collection.query(query_texts=["warmup"], n_results=1)
+        except Exception as e:
+            logger.warning("Vector store warm-up failed: %s", e)
     
     def get_or_create_collection(self, collection_name: Optional[str] = None):
         """
@@ -39,67 +90,180 @@ class VectorStoreService:
             chromadb.Collection: The collection object
         """
         name = collection_name or self.collection_name
-        self.collection = self.client.get_or_create_collection(name=name)
+        self.collection = self.client.get_or_create_collection(
+            name=name,
+            embedding_function=self.embedding_function
+        )
         return self.collection
     
-    def add_documents(self, documents: List[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None):
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts with the collection's embedding model.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            np.ndarray: One float32 embedding row per text
+        """
+        return np.asarray(self.embedding_function(list(texts)), dtype=np.float32)
+    
+    def add_documents(
+        self,
+        documents: List[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        batch_size: int = _ADD_BATCH_SIZE
+    ):
         """
         Add documents to the vector store.
         
-        TODO: Implement document chunking and embedding
-        This is a placeholder for future implementation.
+        Documents are added `batch_size` at a time, so the embedding model
+        runs on full batches instead of one document per call.
+        
+        TODO: Implement document chunking
         
         Args:
             documents: List of text documents to add
             metadatas: Optional metadata for each document
-            ids: Optional unique IDs for each document
+            ids: Optional unique IDs for each document (random UUIDs if omitted)
+            batch_size: Documents embedded and added per collection.add call
         """
-        if self.collection is None:
-            self.get_or_create_collection()
-        
-        # Placeholder implementation
-        print(f"📄 TODO: Add {len(documents)} documents to vector store")
-        
-        # Future: Actual implementation would be:
-        # self.collection.add(
-        #     documents=documents,
-        #     metadatas=metadatas,
-        #     ids=ids
-        # )
+        if ids is None:
+            ids = [str(uuid4()) for _ in documents]
+        
+        for start in range(0, len(documents), batch_size):
+            end = start + batch_size
+            self.collection.add(
+                documents=documents[start:end],
+                metadatas=metadatas[start:end] if metadatas else None,
+                ids=ids[start:end]
+            )
+        self.generation += 1
+        logger.info("Added %d documents to %s", len(documents), self.collection.name)
     
-    def query(self, query_text: str, n_results: int = 5) -> dict:
+    def query(self, query_text: str, n_results: int = 5, query_embedding: Optional[np.ndarray] = None) -> dict:
         """
         Query the vector store for similar documents.
         
+        Concurrent calls are embedded and searched together in one batch;
+        each caller still gets only its own results.
+        
         Args:
             query_text: The query text to search for
             n_results: Number of results to return
+            query_embedding: The query's embedding from embed_query(), if the
+                caller already has it; skips embedding the text again
             
         Returns:
             dict: Query results with documents, distances, etc.
         """
-        if self.collection is None:
-            self.get_or_create_collection()
+        future: Future = Future()
+        self._query_queue.put((query_text, query_embedding, n_results, future))
+        return future.result()
+    
+    def embed_query(self, query_text: str) -> np.ndarray:
+        """
+        Embed a query text on the query worker, in the same embedding call as
+        any other queries queued at the same time.
+        
+        Lets callers check a cache keyed by the embedding before deciding to
+        search, then pass the embedding to query().
+        
+        Args:
+            query_text: The query text to embed
+            
+        Returns:
+            np.ndarray: The query's float32 embedding
+        """
+        future: Future = Future()
+        self._query_queue.put((query_text, None, None, future))
+        return future.result()
+    
+    def _query_worker(self):
+        """Run queued queries, batching whatever has queued up since the last batch."""
+        while True:
+            batch = [self._query_queue.get()]
+            while len(batch) < _MAX_QUERY_BATCH:
+                try:
+                    batch.append(self._query_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            for future, result in zip((item[3] for item in batch), self._query_batch(batch)):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+    
+    def _query_batch(self, batch: List[tuple]) -> list:
+        """
+        Run a batch of (text, embedding, n_results, future) items: embed the
+        texts that came without an embedding in one call, then query the
+        collection once for the items that want results.
+        
+        Items with n_results None only want their embedding.
+        
+        Returns:
+            Per-item results in batch order: a result dict per query, the
+            embedding (or the embedding error) per embed-only item
+        """
+        searches = [i for i, item in enumerate(batch) if item[2] is not None]
+        
+        # Embed the items that came without an embedding in one call
+        embeddings = [item[1] for item in batch]
+        missing = [i for i, item in enumerate(batch) if item[1] is None]
+        try:
+            if missing:
+                for i, embedding in zip(missing, self.embed([batch[i][0] for i in missing])):
+                    embeddings[i] = embedding
+        except Exception as e:
+            logger.error("Error embedding queries: %s", e)
+            return [_empty_result() if item[2] is not None else e for item in batch]
+        
+        output = list(embeddings)
+        if not searches:
+            return output
         
+        # Query the collection
         try:
-            # Query the collection
             results = self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results
+                query_embeddings=[embeddings[i] for i in searches],
+                n_results=max(batch[i][2] for i in searches)
             )
-            return results
         except Exception as e:
-            print(f"Error querying vector store: {e}")
-            return {
-                "documents": [[]],
-                "metadatas": [[]],
-                "distances": [[]],
-                "ids": [[]]
+            logger.error("Error querying vector store: %s", e)
+            for i in searches:
+                output[i] = _empty_result()
+            return output
+        
+        # Split the batch result back out, trimming each to its own n_results
+        for row, i in enumerate(searches):
+            n = batch[i][2]
+            output[i] = {
+                **{
+                    field: [results[field][row][:n]] if results.get(field) is not None else None
+                    for field in _RESULT_FIELDS
+                    if field in results
+                },
+                "included": results.get("included")
             }
+        return output
+
+
+def _empty_result() -> dict:
+    """Result dict for a query that found nothing (or failed)."""
+    return {
+        "documents": [[]],
+        "metadatas": [[]],
+        "distances": [[]],
+        "ids": [[]]
+    }
 
 
 # Global vector store instance
 _vectorstore = None
+_vectorstore_lock = threading.Lock()
 
 
 def get_vectorstore() -> VectorStoreService:
@@ -111,7 +275,10 @@ def get_vectorstore() -> VectorStoreService:
     """
     global _vectorstore
     if _vectorstore is None:
-        _vectorstore = VectorStoreService()
+        # Also created by the startup warm-up thread; don't build two clients
+        with _vectorstore_lock:
+            if _vectorstore is None:
+                _vectorstore = VectorStoreService()
     return _vectorstore
 
 
@@ -1,10 +1,40 @@
 """Database tools for the ReAct agent."""
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 from langchain.tools import tool
 import sqlite3
 
-from app.services.database import get_db_connection
+from app.services.database import db_conn
+
+
+# SQL is kept in module constants so every call passes the same statement
+# text and hits the connection's prepared-statement cache
+_CUSTOMER_BY_ID_SQL = """
+    SELECT customer_id, name, email, phone, created_at
+    FROM customers
+    WHERE customer_id = ?
+"""
+
+_ORDER_BY_ID_SQL = """
+    SELECT order_id, customer_id, product_name, status, amount, order_date
+    FROM orders
+    WHERE order_id = ?
+"""
+
+# Served in order by the (customer_id, order_date) index
+_ORDERS_BY_CUSTOMER_SQL = """
+    SELECT order_id, product_name, status, amount, order_date
+    FROM orders
+    WHERE customer_id = ?
+    ORDER BY order_date DESC
+"""
+
+_UPDATE_ORDER_STATUS_SQL = """
+    UPDATE orders
+    SET status = ?
+    WHERE order_id = ?
+    RETURNING order_id
+"""
 
 
 @tool
@@ -19,17 +49,8 @@ def fetch_customer(customer_id: str) -> Dict[str, Any]:
         Dict containing customer information or error
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT customer_id, name, email, phone, created_at
-            FROM customers
-            WHERE customer_id = ?
-        """, (customer_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        with db_conn() as conn:
+            row = conn.execute(_CUSTOMER_BY_ID_SQL, (customer_id,)).fetchone()
         
         if row:
             return {
@@ -65,17 +86,8 @@ def fetch_order(order_id: str) -> Dict[str, Any]:
         Dict containing order information or error
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT order_id, customer_id, product_name, status, amount, order_date
-            FROM orders
-            WHERE order_id = ?
-        """, (order_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        with db_conn() as conn:
+            row = conn.execute(_ORDER_BY_ID_SQL, (order_id,)).fetchone()
         
         if row:
             return {
@@ -100,6 +112,26 @@ def fetch_order(order_id: str) -> Dict[str, Any]:
         }
 
 
+def iter_orders_by_customer(customer_id: str, batch_size: int = 100) -> Iterator[Dict[str, Any]]:
+    """
+    Stream a customer's orders, newest first, batch_size rows at a time.
+    
+    Holds a pooled connection until the iterator is exhausted or closed.
+    
+    Args:
+        customer_id: The customer ID to search orders for
+        batch_size: Rows fetched from SQLite per batch
+        
+    Yields:
+        Order dictionaries
+    """
+    with db_conn() as conn:
+        cursor = conn.execute(_ORDERS_BY_CUSTOMER_SQL, (customer_id,))
+        while batch := cursor.fetchmany(batch_size):
+            for row in batch:
+                yield dict(row)
+
+
 @tool
 def search_orders_by_customer(customer_id: str) -> List[Dict[str, Any]]:
     """
@@ -109,39 +141,9 @@ def search_orders_by_customer(customer_id: str) -> List[Dict[str, Any]]:
         customer_id: The customer ID to search orders for
         
     Returns:
-        List of order dictionaries or error
+        List of order dictionaries (empty if the customer has none)
     """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT order_id, product_name, status, amount, order_date
-            FROM orders
-            WHERE customer_id = ?
-            ORDER BY order_date DESC
-        """, (customer_id,))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        if rows:
-            orders = [
-                {
-                    "order_id": row["order_id"],
-                    "product_name": row["product_name"],
-                    "status": row["status"],
-                    "amount": row["amount"],
-                    "order_date": row["order_date"]
-                }
-                for row in rows
-            ]
-            return orders
-        else:
-            return []
-    
-    except Exception as e:
-        return [{"status": "error", "message": str(e)}]
+    return list(iter_orders_by_customer(customer_id))
 
 
 @tool
@@ -157,28 +159,17 @@ def update_order_status(order_id: str, new_status: str) -> Dict[str, Any]:
         Dict with update result
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_conn() as conn:
+            # A single autocommitted statement; no row back means no such order.
+            # fetchall() steps it to completion so the write lock is released.
+            updated = conn.execute(_UPDATE_ORDER_STATUS_SQL, (new_status, order_id)).fetchall()
         
-        # Check if order exists
-        cursor.execute("SELECT order_id FROM orders WHERE order_id = ?", (order_id,))
-        if not cursor.fetchone():
-            conn.close()
+        if not updated:
             return {
                 "status": "not_found",
                 "message": f"Order {order_id} not found"
             }
         
-        # Update the status
-        cursor.execute("""
-            UPDATE orders
-            SET status = ?
-            WHERE order_id = ?
-        """, (new_status, order_id))
-        
-        conn.commit()
-        conn.close()
-        
         return {
             "status": "success",
             "order_id": order_id,
@@ -4,7 +4,41 @@ from langchain.tools import tool
 from typing import Optional
 import sqlite3
 
-from app.services.database import get_db_connection
+from app.services.database import db_conn
+
+
+# SQL is kept in module constants so every call passes the same statement
+# text and hits the connection's prepared-statement cache
+
+# Cancels unless the order is already delivered or cancelled
+_CANCEL_ORDER_SQL = """
+    UPDATE orders
+    SET status = 'cancelled'
+    WHERE order_id = ? AND status NOT IN ('delivered', 'cancelled')
+    RETURNING amount
+"""
+
+_ORDER_STATUS_SQL = """
+    SELECT order_id, status
+    FROM orders
+    WHERE order_id = ?
+"""
+
+# Order details with its latest tracking update, if any
+_ORDER_TRACKING_SQL = """
+    SELECT o.order_id, o.status, o.customer_id, o.product_name, o.order_date,
+           t.id AS tracking_id, t.tracking_number, t.carrier, t.status AS tracking_status,
+           t.location, t.estimated_delivery, t.updated_at
+    FROM orders o
+    LEFT JOIN order_tracking t
+      ON t.id = (
+          SELECT id FROM order_tracking
+          WHERE order_id = o.order_id
+          ORDER BY updated_at DESC
+          LIMIT 1
+      )
+    WHERE o.order_id = ?
+"""
 
 
 @tool
@@ -19,38 +53,17 @@ def cancel_order(order_id: str) -> str:
         Cancellation status message
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if order exists and can be cancelled
-        cursor.execute("""
-            SELECT order_id, status, customer_id, amount
-            FROM orders
-            WHERE order_id = ?
-        """, (order_id,))
-        
-        order = cursor.fetchone()
-        
-        if not order:
-            conn.close()
-            return f"❌ Order {order_id} not found in the system."
-        
-        current_status = order["status"]
-        
-        # Only allow cancellation of pending or processing orders
-        if current_status in ["delivered", "cancelled"]:
-            conn.close()
-            return f"❌ Cannot cancel order {order_id}. Current status: {current_status}. Only pending or processing orders can be cancelled."
-        
-        # Update order status to cancelled
-        cursor.execute("""
-            UPDATE orders
-            SET status = 'cancelled'
-            WHERE order_id = ?
-        """, (order_id,))
-        
-        conn.commit()
-        conn.close()
+        with db_conn() as conn:
+            cancelled = conn.execute(_CANCEL_ORDER_SQL, (order_id,)).fetchall()
+            
+            if not cancelled:
+                # Only look the order up to explain why nothing changed
+                order = conn.execute(_ORDER_STATUS_SQL, (order_id,)).fetchone()
+                if not order:
+                    return f"❌ Order {order_id} not found in the system."
+                return f"❌ Cannot cancel order {order_id}. Current status: {order['status']}. Only pending or processing orders can be cancelled."
+        
+        order = cancelled[0]
         
         return f"✅ Order {order_id} has been successfully cancelled. Amount ₹{order['amount']:.2f} will be refunded within 5-7 business days."
     
@@ -71,32 +84,21 @@ def modify_order_address(order_id: str, new_address: str) -> str:
         Modification status message
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Check if order exists
-        cursor.execute("""
-            SELECT order_id, status
-            FROM orders
-            WHERE order_id = ?
-        """, (order_id,))
-        
-        order = cursor.fetchone()
+        with db_conn() as conn:
+            order = conn.execute(_ORDER_STATUS_SQL, (order_id,)).fetchone()
         
         if not order:
-            conn.close()
             return f"❌ Order {order_id} not found in the system."
         
         current_status = order["status"]
         
         # Only allow address modification for pending orders
         if current_status not in ["pending", "processing"]:
-            conn.close()
             return f"❌ Cannot modify address for order {order_id}. Current status: {current_status}. Address can only be changed for pending or processing orders."
         
         # Note: In a real system, you'd have a separate addresses table
         # For now, we'll just confirm the request
-        conn.close()
         
         return f"✅ Shipping address for order {order_id} has been updated to: {new_address}. Changes will be reflected in the next shipment update."
     
@@ -116,47 +118,25 @@ def track_shipment(order_id: str) -> str:
         Tracking information with current status and location
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get order details
-        cursor.execute("""
-            SELECT o.order_id, o.status, o.customer_id, o.product_name, o.order_date
-            FROM orders o
-            WHERE o.order_id = ?
-        """, (order_id,))
-        
-        order = cursor.fetchone()
+        with db_conn() as conn:
+            order = conn.execute(_ORDER_TRACKING_SQL, (order_id,)).fetchone()
         
         if not order:
-            conn.close()
             return f"❌ Order {order_id} not found in the system."
         
-        # Get tracking information
-        cursor.execute("""
-            SELECT tracking_number, carrier, status, location, estimated_delivery, updated_at
-            FROM order_tracking
-            WHERE order_id = ?
-            ORDER BY updated_at DESC
-            LIMIT 1
-        """, (order_id,))
-        
-        tracking = cursor.fetchone()
-        conn.close()
-        
-        if tracking:
+        if order['tracking_id'] is not None:
             result = f"""
 📦 **Tracking Information for Order {order_id}**
 
 **Product:** {order['product_name']}
 **Order Status:** {order['status']}
 
-**Carrier:** {tracking['carrier']}
-**Tracking Number:** {tracking['tracking_number']}
-**Current Status:** {tracking['status']}
-**Current Location:** {tracking['location']}
-**Estimated Delivery:** {tracking['estimated_delivery']}
-**Last Updated:** {tracking['updated_at']}
+**Carrier:** {order['carrier']}
+**Tracking Number:** {order['tracking_number']}
+**Current Status:** {order['tracking_status']}
+**Current Location:** {order['location']}
+**Estimated Delivery:** {order['estimated_delivery']}
+**Last Updated:** {order['updated_at']}
 """
         else:
             # No tracking info yet
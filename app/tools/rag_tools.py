@@ -1,11 +1,93 @@
 """RAG (Retrieval-Augmented Generation) tools for the ReAct agent."""
 
+from functools import lru_cache
 from typing import List, Dict, Any
+import numpy as np
 from langchain.tools import tool
 
+from app.services.cache import EmbeddingResultCache, normalize_query
 from app.services.vectorstore import get_vectorstore
 
 
+# Second cache tier behind the exact-query lru_caches: reworded repeats of
+# an earlier question reuse its results without a vector store search
+_faq_result_cache = EmbeddingResultCache(threshold=0.95, max_entries=512)
+_docs_result_cache = EmbeddingResultCache(threshold=0.95, max_entries=512)
+
+# Relevance label by distance bucket: below 0.5, below 1.0, anything further.
+# Lower distance = more similar.
+_RELEVANCE_CUTOFFS = np.array([0.5, 1.0])
+_RELEVANCE_LABELS = np.array(["High", "Medium", "Low"])
+
+
+def _search(query: str, n_results: int, generation: int, result_cache: EmbeddingResultCache, format_results) -> str:
+    """
+    Search the vector store, going through a semantic result cache.
+    
+    The query is embedded once, by the vector store's query worker so it
+    batches with concurrent searches; that embedding is used both for the
+    cache lookup and, on a miss, for the vector store search. Raises LookupError
+    when nothing matches so empty results (including a failed vector store
+    query) are never cached.
+    """
+    vectorstore = get_vectorstore()
+    embedding = vectorstore.embed_query(query)
+    
+    cached = result_cache.get(embedding, n_results, generation)
+    if cached is not None:
+        return cached
+    
+    results = vectorstore.query(query, n_results=n_results, query_embedding=embedding)
+    
+    if not results or not results.get("documents") or len(results["documents"][0]) == 0:
+        raise LookupError("No relevant entries found")
+    
+    formatted = format_results(results)
+    result_cache.set(embedding, n_results, formatted, generation)
+    return formatted
+
+
+def _format_faq(results: dict) -> str:
+    """Format FAQ matches with a relevance label per entry."""
+    # side="right" so a distance equal to a cutoff falls in the worse bucket
+    labels = _RELEVANCE_LABELS[
+        np.searchsorted(_RELEVANCE_CUTOFFS, results["distances"][0], side="right")
+    ]
+    return "\n".join(
+        f"{i}. [Relevance: {relevance}]\n{doc}\n"
+        for i, (relevance, doc) in enumerate(zip(labels, results["documents"][0]), 1)
+    )
+
+
+def _format_docs(results: dict) -> str:
+    """Format documentation matches."""
+    formatted_results = []
+    for i, doc in enumerate(results["documents"][0], 1):
+        formatted_results.append(f"Documentation #{i}:\n{doc}\n")
+    
+    return "\n".join(formatted_results)
+
+
+@lru_cache(maxsize=4096)
+def _search_faq(query: str, n_results: int, generation: int) -> str:
+    """
+    Search the FAQ collection and format the matches.
+    
+    Cached by normalized query and index generation.
+    """
+    return _search(query, n_results, generation, _faq_result_cache, _format_faq)
+
+
+@lru_cache(maxsize=4096)
+def _search_docs(query: str, n_results: int, generation: int) -> str:
+    """
+    Search product documentation and format the matches.
+    
+    Cached by normalized query and index generation.
+    """
+    return _search(query, n_results, generation, _docs_result_cache, _format_docs)
+
+
 @tool
 def semantic_search_faq(query: str, n_results: int = 3) -> str:
     """
@@ -19,20 +101,10 @@ def semantic_search_faq(query: str, n_results: int = 3) -> str:
         String containing relevant FAQ answers
     """
     try:
-        vectorstore = get_vectorstore()
-        results = vectorstore.query(query, n_results=n_results)
-        
-        if not results or not results.get("documents") or len(results["documents"][0]) == 0:
-            return "No relevant FAQ entries found. Please contact support for assistance."
-        
-        # Format the results
-        formatted_results = []
-        for i, (doc, distance) in enumerate(zip(results["documents"][0], results["distances"][0]), 1):
-            # Lower distance = more similar
-            relevance = "High" if distance < 0.5 else "Medium" if distance < 1.0 else "Low"
-            formatted_results.append(f"{i}. [Relevance: {relevance}]\n{doc}\n")
-        
-        return "\n".join(formatted_results)
+        return _search_faq(normalize_query(query), n_results, get_vectorstore().generation)
+    
+    except LookupError:
+        return "No relevant FAQ entries found. Please contact support for assistance."
     
     except Exception as e:
         return f"Error searching FAQ: {str(e)}"
@@ -51,19 +123,10 @@ def search_product_documentation(query: str, n_results: int = 2) -> str:
         Relevant documentation snippets
     """
     try:
-        vectorstore = get_vectorstore()
-        # Search with metadata filter for documentation type
-        results = vectorstore.query(query, n_results=n_results)
-        
-        if not results or not results.get("documents") or len(results["documents"][0]) == 0:
-            return "No relevant documentation found. Please visit our documentation portal or contact support."
-        
-        # Format the results
-        formatted_results = []
-        for i, doc in enumerate(results["documents"][0], 1):
-            formatted_results.append(f"Documentation #{i}:\n{doc}\n")
-        
-        return "\n".join(formatted_results)
+        return _search_docs(normalize_query(query), n_results, get_vectorstore().generation)
+    
+    except LookupError:
+        return "No relevant documentation found. Please visit our documentation portal or contact support."
     
     except Exception as e:
         return f"Error searching documentation: {str(e)}"
@@ -1,11 +1,13 @@
 """Complete refund workflow tools that handle order lookup and refund processing."""
 
 from langchain.tools import tool
-from typing import Optional
+from typing import Dict, Optional
+import re
 import stripe
+import threading
 import time
 
-from app.services.database import get_db_connection
+from app.services.database import db_conn, transaction
 from app.services.email_service import email_service
 from app.services.slack_service import slack_service
 from app.utils.config import settings
@@ -14,6 +16,122 @@ from app.utils.config import settings
 if settings.stripe_api_key:
     stripe.api_key = settings.stripe_api_key
 
+# One process-wide HTTP client for Stripe calls. By default stripe-python
+# keeps a separate requests session per thread, and tool calls run on
+# whichever worker thread is free, so a call often opened a new TLS
+# connection. httpx.Client is thread-safe and shares its keep-alive pool.
+stripe.default_http_client = stripe.HTTPXClient(timeout=30, allow_sync_methods=True)
+
+# Checked before any database or Stripe call, so malformed input fails fast
+_ORDER_ID_RE = re.compile(r"ORD\d{4,}")
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+# Checking eligibility and then processing the refund retrieves the same
+# PaymentIntent twice in a row; reuse it for a short while instead
+_INTENT_CACHE_TTL = 60.0
+_INTENT_CACHE_MAX_SIZE = 1024
+# PaymentIntent ID -> (PaymentIntent, time retrieved)
+_intent_cache: Dict[str, tuple] = {}
+_intent_cache_lock = threading.Lock()
+
+
+# SQL is kept in module constants so every call passes the same statement
+# text and hits the connection's prepared-statement cache
+
+# Order with its customer's name and its latest payment, if any
+_ORDER_PAYMENT_SQL = """
+    SELECT o.order_id, o.customer_id, o.product_name, o.status, o.amount, o.order_date,
+           c.name AS customer_name,
+           p.stripe_payment_id, p.amount AS payment_amount, p.status AS payment_status
+    FROM orders o
+    LEFT JOIN customers c ON c.customer_id = o.customer_id
+    LEFT JOIN payments p
+      ON p.id = (
+          SELECT id FROM payments
+          WHERE order_id = o.order_id
+          ORDER BY created_at DESC
+          LIMIT 1
+      )
+    WHERE o.order_id = ?
+"""
+
+_MARK_REFUNDED_SQL = """
+    UPDATE orders
+    SET status = 'refunded'
+    WHERE order_id = ?
+"""
+
+
+# Largest refund, in major currency units, processed without manual review
+_REFUND_LIMITS = {"USD": 120, "INR": 10000}
+# Currency code -> display symbol; anything else is shown with '$'
+_CURRENCY_SYMBOLS = {"INR": "₹"}
+
+# Customer-facing messages, filled in with str.format
+_HIGH_VALUE_REFUND_MSG = """
+I understand you'd like to process a refund for order {order_id}. However, the refund amount of {symbol}{amount:.2f} exceeds our automated limit of {symbol}{limit}.
+
+I've created a support ticket ({ticket_id}) for this high-value refund, and our finance team will review it within 4 hours. You'll receive an email confirmation once the refund is approved and processed.
+
+Is there anything else I can help you with?
+"""
+
+_REFUND_SUCCESS_MSG = """
+✅ **Refund Processed Successfully!**
+
+I've processed your refund for order {order_id}. Here are the details:
+
+**Order Details:**
+- Order ID: {order_id}
+- Product: {product_name}
+- Amount Refunded: {symbol}{amount:.2f} {currency}
+
+**Refund Information:**
+- Refund ID: {refund_id}
+- Status: {refund_status}
+- Payment Method: The refund will be credited to your original payment method
+
+**Timeline:**
+The refund will appear in your account within **5-7 business days**, depending on your bank or card issuer.{email_confirmation}
+
+*, depending on your bank or card issuer.
+
+You'll receive a confirmation email shortly with all the details. Is there anything else I can help you with?
+"""
+
+_REFUND_ELIGIBLE_MSG = """
+✅ **Order {order_id} is eligible for refund**
+
+**Refundable Amount:** {symbol}{amount:.2f} {currency}
+**Order Status:** {order_status}
+**Payment Status:** {payment_status}
+
+Would you like me to proceed with processing the refund?
+"""
+
+
+def _retrieve_payment_intent(payment_id: str) -> stripe.PaymentIntent:
+    """Retrieve a PaymentIntent, reusing one fetched in the last _INTENT_CACHE_TTL seconds."""
+    now = time.monotonic()
+    with _intent_cache_lock:
+        cached = _intent_cache.get(payment_id)
+    if cached and now - cached[1] < _INTENT_CACHE_TTL:
+        return cached[0]
+    
+    payment_intent = stripe.PaymentIntent.retrieve(payment_id)
+    with _intent_cache_lock:
+        if len(_intent_cache) >= _INTENT_CACHE_MAX_SIZE:
+            # Dicts keep insertion order, so this drops the oldest entry
+            _intent_cache.pop(next(iter(_intent_cache)))
+        _intent_cache[payment_id] = (payment_intent, now)
+    return payment_intent
+
+
+def _invalidate_payment_intent(payment_id: str) -> None:
+    """Drop a cached PaymentIntent, e.g. after refunding it."""
+    with _intent_cache_lock:
+        _intent_cache.pop(payment_id, None)
+
 
 @tool
 def process_refund_for_order(order_id: str, customer_email: str, reason: str = "requested_by_customer") -> str:
@@ -35,59 +153,40 @@ def process_refund_for_order(order_id: str, customer_email: str, reason: str = "
     Returns:
         Formatted refund status with all details
     """
+    if not _ORDER_ID_RE.fullmatch(order_id):
+        return f"❌ '{order_id}' doesn't look like a valid order ID (e.g. ORD0001). Could you please verify the order ID?"
+    if not _EMAIL_RE.fullmatch(customer_email):
+        return f"❌ '{customer_email}' doesn't look like a valid email address. Could you please double-check it?"
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Step 1: Look up order
-        cursor.execute("""
-            SELECT o.order_id, o.customer_id, o.product_name, o.status, o.amount, o.order_date
-            FROM orders o
-            WHERE o.order_id = ?
-        """, (order_id,))
-        
-        order = cursor.fetchone()
+        # Steps 1-2: Look up the order, its latest payment and the customer's name
+        with db_conn() as conn:
+            order = conn.execute(_ORDER_PAYMENT_SQL, (order_id,)).fetchone()
         
         if not order:
-            conn.close()
             return f"❌ I couldn't find order {order_id} in our system. Could you please verify the order ID?"
         
         # Check if order is already cancelled or refunded
         if order['status'] == 'cancelled':
-            conn.close()
             return f"❌ Order {order_id} has already been cancelled. No further action needed."
         
-        # Step 2: Find payment associated with this order
-        cursor.execute("""
-            SELECT stripe_payment_id, amount, status
-            FROM payments
-            WHERE order_id = ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        """, (order_id,))
-        
-        payment = cursor.fetchone()
-        
-        if not payment:
-            conn.close()
+        if not order['stripe_payment_id']:
             return f"❌ I couldn't find any payment information for order {order_id}. Please contact our support team for assistance."
         
-        payment_id = payment['stripe_payment_id']
-        payment_amount = payment['amount']
-        payment_status = payment['status']
+        payment_id = order['stripe_payment_id']
+        payment_amount = order['payment_amount']
+        payment_status = order['payment_status']
         
         # Step 3: Check payment status in database first
         if payment_status != "succeeded":
-            conn.close()
             return f"❌ This payment cannot be refunded because its status is '{payment_status}'. Only successful payments can be refunded."
         
         # Step 4: Validate with Stripe API
         try:
-            payment_intent = stripe.PaymentIntent.retrieve(payment_id)
+            payment_intent = _retrieve_payment_intent(payment_id)
             
             # Check if payment is eligible for refund
             if payment_intent.status != "succeeded":
-                conn.close()
                 return f"❌ This payment cannot be refunded because its status is '{payment_intent.status}'. Only successful payments can be refunded."
             
             # Get amount_refunded safely (might not exist in all payment intents)
@@ -95,7 +194,6 @@ def process_refund_for_order(order_id: str, customer_email: str, reason: str = "
             
             # Check if already fully refunded
             if amount_refunded >= payment_intent.amount:
-                conn.close()
                 return f"❌ This order has already been fully refunded."
             
             # Calculate refund amount (Stripe amounts are in cents)
@@ -103,19 +201,13 @@ def process_refund_for_order(order_id: str, customer_email: str, reason: str = "
             currency = payment_intent.currency.upper()
             
         except stripe.error.InvalidRequestError as e:
-            conn.close()
             return f"❌ Unable to validate payment with Stripe: {str(e)}. Please contact our support team."
         except Exception as e:
-            conn.close()
             return f"❌ Error connecting to payment system: {str(e)}"
         
         # Step 5: Apply safety guardrails (automated refund limits)
-        
-        # Check refund limits
-        REFUND_LIMIT_USD = 120
-        REFUND_LIMIT_INR = 10000
-        
-        if currency == "USD" and refund_amount_dollars > REFUND_LIMIT_USD:
+        limit = _REFUND_LIMITS.get(currency)
+        if limit is not None and refund_amount_dollars > limit:
             # Create support ticket for manual review
             ticket_id = f"TKT-{order_id}-{int(time.time())}"
             
@@ -128,35 +220,13 @@ def process_refund_for_order(order_id: str, customer_email: str, reason: str = "
                 ticket_id=ticket_id
             )
             
-            conn.close()
-            return f"""
-I understand you'd like to process a refund for order {order_id}. However, the refund amount of ${refund_amount_dollars:.2f} exceeds our automated limit of ${REFUND_LIMIT_USD}.
-
-I've created a support ticket ({ticket_id}) for this high-value refund, and our finance team will review it within 4 hours. You'll receive an email confirmation once the refund is approved and processed.
-
-Is there anything else I can help you with?
-"""
-        elif currency == "INR" and refund_amount_dollars > REFUND_LIMIT_INR:
-            # Create support ticket for manual review
-            ticket_id = f"TKT-{order_id}-{int(time.time())}"
-            
-            # Send Slack alert for high-value refund
-            slack_service.send_high_value_refund_alert(
+            return _HIGH_VALUE_REFUND_MSG.format(
                 order_id=order_id,
-                customer_email=customer_email,
-                refund_amount=refund_amount_dollars,
-                currency=currency,
+                symbol=_CURRENCY_SYMBOLS.get(currency, "$"),
+                amount=refund_amount_dollars,
+                limit=limit,
                 ticket_id=ticket_id
             )
-            
-            conn.close()
-            return f"""
-I understand you'd like to process a refund for order {order_id}. However, the refund amount of ₹{refund_amount_dollars:.2f} exceeds our automated limit of ₹{REFUND_LIMIT_INR}.
-
-I've created a support ticket ({ticket_id}) for this high-value refund, and our finance team will review it within 4 hours. You'll receive an email confirmation once the refund is approved and processed.
-
-Is there anything else I can help you with?
-"""
         
         # Step 6: Process the refund through Stripe
         try:
@@ -165,32 +235,18 @@ Is there anything else I can help you with?
                 reason=reason
             )
         except stripe.error.StripeError as e:
-            conn.close()
             return f"❌ Stripe refund failed: {str(e)}. Please contact our support team."
+        finally:
+            # Whether or not it went through, amount_refunded may have changed
+            _invalidate_payment_intent(payment_id)
         
         # Step 7: Update order status in database
-        cursor.execute("""
-            UPDATE orders
-            SET status = 'refunded'
-            WHERE order_id = ?
-        """, (order_id,))
-        
-        conn.commit()
-        
-        # Step 8: Get customer name and send email notification
-        symbol = "₹" if currency == "INR" else "$"
+        with transaction() as conn:
+            conn.execute(_MARK_REFUNDED_SQL, (order_id,))
         
-        # Get customer name from database
-        cursor.execute("""
-            SELECT c.name
-            FROM customers c
-            JOIN orders o ON c.customer_id = o.customer_id
-            WHERE o.order_id = ?
-        """, (order_id,))
-        customer_result = cursor.fetchone()
-        customer_name = customer_result['name'] if customer_result else "Customer"
-        
-        conn.close()
+        # Step 8: Send email notification
+        symbol = _CURRENCY_SYMBOLS.get(currency, "$")
+        customer_name = order['customer_name'] or "Customer"
         
         # Send email notification
         email_sent = email_service.send_refund_notification(
@@ -215,28 +271,16 @@ Is there anything else I can help you with?
             email_confirmation = f"\n\n📧 A confirmation email has been sent to {customer_email} with all the refund details."
         
         # Step 9: Return success message
-        return f"""
-✅ **Refund Processed Successfully!**
-
-I've processed your refund for order {order_id}. Here are the details:
-
-**Order Details:**
-- Order ID: {order_id}
-- Product: {order['product_name']}
-- Amount Refunded: {symbol}{refund_amount_dollars:.2f} {currency}
-
-**Refund Information:**
-- Refund ID: {refund.id}
-- Status: {refund.status}
-- Payment Method: The refund will be credited to your original payment method
-
-**Timeline:**
-The refund will appear in your account within **5-7 business days**, depending on your bank or card issuer.{email_confirmation}
-
-*, depending on your bank or card issuer.
-
-You'll receive a confirmation email shortly with all the details. Is there anything else I can help you with?
-"""
+        return _REFUND_SUCCESS_MSG.format(
+            order_id=order_id,
+            product_name=order['product_name'],
+            symbol=symbol,
+            amount=refund_amount_dollars,
+            currency=currency,
+            refund_id=refund.id,
+            refund_status=refund.status,
+            email_confirmation=email_confirmation
+        )
     
     except stripe.error.StripeError as e:
         return f"❌ Error processing refund with payment provider: {str(e)}"
@@ -255,21 +299,13 @@ def check_refund_eligibility(order_id: str) -> str:
     Returns:
         Refund eligibility status and details
     """
+    if not _ORDER_ID_RE.fullmatch(order_id):
+        return f"❌ '{order_id}' doesn't look like a valid order ID (e.g. ORD0001)."
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Look up order
-        cursor.execute("""
-            SELECT o.order_id, o.status, o.amount, o.order_date,
-                   p.stripe_payment_id, p.status as payment_status
-            FROM orders o
-            LEFT JOIN payments p ON o.order_id = p.order_id
-            WHERE o.order_id = ?
-        """, (order_id,))
-        
-        order = cursor.fetchone()
-        conn.close()
+        with db_conn() as conn:
+            order = conn.execute(_ORDER_PAYMENT_SQL, (order_id,)).fetchone()
         
         if not order:
             return f"❌ Order {order_id} not found."
@@ -282,7 +318,7 @@ def check_refund_eligibility(order_id: str) -> str:
         
         # Check payment status with Stripe
         try:
-            payment_intent = stripe.PaymentIntent.retrieve(order['stripe_payment_id'])
+            payment_intent = _retrieve_payment_intent(order['stripe_payment_id'])
             
             if payment_intent.status != "succeeded":
                 return f"❌ Payment status is '{payment_intent.status}'. Only successful payments can be refunded."
@@ -293,17 +329,16 @@ def check_refund_eligibility(order_id: str) -> str:
             if refundable_amount <= 0:
                 return f"❌ Order {order_id} has already been fully refunded."
             
-            symbol = "₹" if currency == "INR" else "$"
+            symbol = _CURRENCY_SYMBOLS.get(currency, "$")
             
-            return f"""
-✅ **Order {order_id} is eligible for refund**
-
-**Refundable Amount:** {symbol}{refundable_amount:.2f} {currency}
-**Order Status:** {order['status']}
-**Payment Status:** {payment_intent.status}
-
-Would you like me to proceed with processing the refund?
-"""
+            return _REFUND_ELIGIBLE_MSG.format(
+                order_id=order_id,
+                symbol=symbol,
+                amount=refundable_amount,
+                currency=currency,
+                order_status=order['status'],
+                payment_status=payment_intent.status
+            )
         
         except stripe.error.StripeError as e:
             return f"❌ Error checking payment status: {str(e)}"
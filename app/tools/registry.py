@@ -0,0 +1,73 @@
+"""Lazily loaded registry of the agent's tools."""
+
+import ast
+import importlib
+import importlib.util
+from typing import Dict, Tuple
+
+
+# Tool lists in registration order, as (module, list name). A module is only
+# imported the first time one of its tools is used; the RAG and Stripe tools
+# pull in chromadb and stripe, which dominate startup time.
+TOOL_GROUPS = [
+    ("app.tools.db_tools", "db_tools"),
+    ("app.tools.order_management_tools", "order_management_tools"),
+    ("app.tools.rag_tools", "rag_tools"),
+    ("app.tools.stripe_tools", "stripe_tools"),
+    ("app.tools.refund_workflow_tools", "refund_workflow_tools"),
+    ("app.tools.replacement_tools", "replacement_tools"),
+    ("app.services.escalation", "escalation_tools"),
+]
+
+
+def _read_tool_list(module_name: str, list_name: str) -> Dict[str, str]:
+    """
+    Read tool names and descriptions for a tool list without importing its module.
+
+    The module's list assignment gives the tools and their order; each tool's
+    description is its function docstring, as with LangChain's @tool.
+
+    Args:
+        module_name: Dotted module path
+        list_name: Name of the module-level tool list
+
+    Returns:
+        Dict mapping tool name to description, in list order
+    """
+    with open(importlib.util.find_spec(module_name).origin, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    docstrings = {
+        node.name: ast.get_docstring(node) or ""
+        for node in tree.body
+        if isinstance(node, ast.FunctionDef)
+    }
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == list_name for target in node.targets
+        ):
+            return {element.id: docstrings[element.id] for element in node.value.elts}
+    raise ValueError(f"Tool list '{list_name}' not found in {module_name}")
+
+
+# Tool name -> description, and tool name -> (module, list name)
+TOOL_DESCRIPTIONS: Dict[str, str] = {}
+_TOOL_SOURCES: Dict[str, Tuple[str, str]] = {}
+for _module_name, _list_name in TOOL_GROUPS:
+    for _tool_name, _description in _read_tool_list(_module_name, _list_name).items():
+        TOOL_DESCRIPTIONS[_tool_name] = _description
+        _TOOL_SOURCES[_tool_name] = (_module_name, _list_name)
+
+
+class LazyToolMap(dict):
+    """Maps tool names to tools, importing a tool's module on first lookup."""
+
+    def __missing__(self, name: str):
+        module_name, list_name = _TOOL_SOURCES[name]
+        for tool in getattr(importlib.import_module(module_name), list_name):
+            self[tool.name] = tool
+        return self[name]
+
+
+# Shared by all agents
+tool_map = LazyToolMap()
@@ -1,13 +1,38 @@
 """Product replacement workflow tools."""
 
+import re
 from langchain.tools import tool
 from datetime import datetime
-from app.services.database import get_db_connection
+from app.services.database import db_conn
 from app.services.escalation import EscalationManager
 from app.services.email_service import email_service
 from app.services.slack_service import slack_service
 
 
+# Checked before any database call, so malformed input fails fast
+_ORDER_ID_RE = re.compile(r"ORD\d{4,}")
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+# "order_id|customer_email[|reason]", with whitespace around each field
+# ignored; the email may be empty and any fields after the reason are ignored
+_INPUT_RE = re.compile(r"\s*([^|]+?)\s*\|\s*([^|]*?)\s*(?:\|\s*([^|]*?)\s*(?:\|.*)?)?", re.DOTALL)
+
+# Reason codes -> human-readable descriptions; unknown reasons are shown as given
+_REASON_MAP = {
+    "defective_product": "Defective Product",
+    "wrong_item": "Wrong Item Received",
+    "damaged_delivery": "Damaged During Delivery",
+    "quality_issue": "Quality Issue"
+}
+
+_REPLACEMENT_ORDER_SQL = """
+    SELECT o.id, o.order_id, o.amount, o.status, o.product_name, c.email
+    FROM orders o
+    LEFT JOIN customers c ON o.customer_id = c.id
+    WHERE o.order_id = ?
+"""
+
+
 @tool
 def request_product_replacement(input_string: str) -> str:
     """
@@ -19,7 +44,8 @@ def request_product_replacement(input_string: str) -> str:
     Args:
         input_string: Pipe-separated string "order_id|customer_email|reason"
                      Example: "ORD0001|customer@example.com|defective_product"
-                     Reason is optional (default: defective_product)
+                     Email and reason are optional (reason default: defective_product);
+                     without an email no confirmation email is sent
     
     Returns:
         str: Confirmation message with ticket ID
@@ -29,25 +55,21 @@ def request_product_replacement(input_string: str) -> str:
     """
     try:
         # Parse input string
-        parts = input_string.split("|")
-        if len(parts) < 2:
+        match = _INPUT_RE.fullmatch(input_string)
+        if not match:
             return "❌ Invalid input format. Expected: order_id|customer_email|reason"
         
-        order_id = parts[0].strip()
-        customer_email = parts[1].strip()
-        reason = parts[2].strip() if len(parts) > 2 else "defective_product"
-        # Validate order exists and is eligible for replacement
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        order_id, customer_email, reason = match.groups()
+        reason = reason or "defective_product"
         
-        cursor.execute("""
-            SELECT o.id, o.order_id, o.amount, o.status, o.product_name, c.email
-            FROM orders o
-            LEFT JOIN customers c ON o.customer_id = c.id
-            WHERE o.order_id = ?
-        """, (order_id,))
+        if not _ORDER_ID_RE.fullmatch(order_id):
+            return f"❌ '{order_id}' doesn't look like a valid order ID (e.g. ORD0001). Please check the order number and try again."
+        if customer_email and not _EMAIL_RE.fullmatch(customer_email):
+            return f"❌ '{customer_email}' doesn't look like a valid email address. Please check it and try again."
         
-        order = cursor.fetchone()
+        # Validate order exists and is eligible for replacement
+        with db_conn() as conn:
+            order = conn.execute(_REPLACEMENT_ORDER_SQL, (order_id,)).fetchone()
         
         if not order:
             return f"❌ Order {order_id} not found. Please check the order number and try again."
@@ -60,15 +82,7 @@ def request_product_replacement(input_string: str) -> str:
         if order_status not in ["delivered", "shipped"]:
             return f"❌ Order {order_id} is not eligible for replacement. Current status: {order_status}. Only delivered orders can be replaced."
         
-        # Map reason codes to human-readable descriptions
-        reason_map = {
-            "defective_product": "Defective Product",
-            "wrong_item": "Wrong Item Received",
-            "damaged_delivery": "Damaged During Delivery",
-            "quality_issue": "Quality Issue"
-        }
-        
-        reason_description = reason_map.get(reason, reason)
+        reason_description = _REASON_MAP.get(reason, reason)
         
         # Create detailed issue description
         issue_description = f"""
@@ -114,8 +128,6 @@ Customer has requested a replacement for order {order_id}. Please verify the iss
             amount=amount
         )
         
-        conn.close()
-        
         return f"""
 ✅ **Replacement Request Submitted**
 
@@ -137,3 +149,7 @@ Is there anything else I can help you with?
         
     except Exception as e:
         return f"❌ Error processing replacement request: {str(e)}"
+
+
+# Export tools as a list for easy registration
+replacement_tools = [request_product_replacement]
@@ -22,16 +22,34 @@ class Settings(BaseSettings):
     smtp_password: str = Field(default="", alias="SMTP_PASSWORD")
     sender_email: str = Field(default="", alias="SENDER_EMAIL")
     email_enabled: bool = Field(default=False, alias="EMAIL_ENABLED")
+    smtp_pool_size: int = Field(default=2, alias="SMTP_POOL_SIZE")
     
     # LLM
     model_name: str = Field(default="llama3", alias="MODEL_NAME")
     ollama_base_url: str = Field(default="http://localhost:11434", alias="OLLAMA_BASE_URL")
+    llm_max_batch_size: int = Field(default=8, alias="LLM_MAX_BATCH_SIZE")
+    llm_max_batch_delay_ms: int = Field(default=20, alias="LLM_MAX_BATCH_DELAY_MS")
+    agent_timeout_s: float = Field(default=45, alias="AGENT_TIMEOUT_S")
     
     # Database
     database_path: str = Field(default="data/db.sqlite", alias="DATABASE_PATH")
+    db_pool_size: int = Field(default=8, alias="DB_POOL_SIZE")
+    analyze_interval_sec: int = Field(default=3600, alias="ANALYZE_INTERVAL_SEC")
     
     # Vector Store
     vectorstore_path: str = Field(default="vectorstore/", alias="VECTORSTORE_PATH")
+    # Set to use a shared Chroma server instead of the local store at vectorstore_path
+    chroma_host: str = Field(default="", alias="CHROMA_HOST")
+    chroma_port: int = Field(default=8000, alias="CHROMA_PORT")
+    
+    # Semantic response cache
+    semantic_cache_enabled: bool = Field(default=True, alias="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_threshold: float = Field(default=0.92, alias="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_ttl: int = Field(default=3600, alias="SEMANTIC_CACHE_TTL")
+    
+    # Embedding intent classifier, used when no intent keyword matches
+    intent_classifier_enabled: bool = Field(default=True, alias="INTENT_CLASSIFIER_ENABLED")
+    intent_classifier_threshold: float = Field(default=0.65, alias="INTENT_CLASSIFIER_THRESHOLD")
     
     # App
     app_name: str = Field(default="Autonomous Customer Support Agent", alias="APP_NAME")
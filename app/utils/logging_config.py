@@ -1,7 +1,10 @@
 """Structured logging configuration for the application."""
 
-import logging
 import sys
+import queue
+import atexit
+import logging
+import logging.handlers
 from datetime import datetime
 from typing import Optional, Dict, Any
 import json
@@ -47,10 +50,29 @@ class StructuredFormatter(logging.Formatter):
         return json.dumps(log_data)
 
 
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler for a listener in the same process.
+    
+    Records are queued as-is, so exception info still reaches the
+    JSON formatter instead of being flattened into the message.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# Writes queued records to the real handlers on a background thread
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
 def setup_logging(log_level: str = "INFO") -> logging.Logger:
     """
     Configure structured logging for the application.
     
+    Callers only put records on a queue; console and file output happens
+    on a QueueListener thread, so logging never blocks a request on I/O.
+    
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         
@@ -62,6 +84,9 @@ def setup_logging(log_level: str = "INFO") -> logging.Logger:
     logger.setLevel(getattr(logging, log_level.upper()))
     
     # Clear existing handlers
+    global _listener
+    if _listener is not None:
+        _listener.stop()
     logger.handlers.clear()
     
     # Console handler with pretty formatting
@@ -72,7 +97,6 @@ def setup_logging(log_level: str = "INFO") -> logging.Logger:
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
     
     # File handler with JSON formatting
     file_handler = logging.FileHandler(
@@ -80,7 +104,6 @@ def setup_logging(log_level: str = "INFO") -> logging.Logger:
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(StructuredFormatter())
-    logger.addHandler(file_handler)
     
     # Error file handler
     error_handler = logging.FileHandler(
@@ -88,13 +111,29 @@ def setup_logging(log_level: str = "INFO") -> logging.Logger:
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(StructuredFormatter())
-    logger.addHandler(error_handler)
+    
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(LocalQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, error_handler,
+        respect_handler_level=True
+    )
+    _listener.start()
     
     return logger
 
 
+def stop_logging():
+    """Flush queued log records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 # Global logger instance
 logger = setup_logging(log_level=settings.log_level if hasattr(settings, 'log_level') else "INFO")
+atexit.register(stop_logging)
 
 
 def log_tool_execution(tool_name: str, input_data: str, result: str, execution_time: float, session_id: Optional[str] = None):
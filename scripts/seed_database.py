@@ -8,7 +8,7 @@ from datetime import datetime, timedelta
 import random
 from pathlib import Path
 
-from app.services.database import get_db_connection, initialize_db
+from app.services.database import get_db_connection, initialize_db, create_indexes
 from app.utils.config import settings
 
 
@@ -187,13 +187,16 @@ def main():
     
     # Initialize database schema first
     print("🔧 Initializing database schema...")
-    initialize_db()
+    initialize_db(with_indexes=False)
     
     # Seed data
     seed_customers()
     seed_orders()
     seed_payments()
     
+    # Build indexes once over the seeded rows rather than on every insert
+    create_indexes()
+    
     # Show statistics
     show_stats()
     
@@ -14,7 +14,7 @@ print(f"\nSlack Enabled: {slack_service.enabled}")
 
 if slack_service.enabled:
     print("\n1. Testing refund notification...")
-    result = slack_service.send_refund_notification(
+    queued = slack_service.send_refund_notification(
         order_id="ORD0041",
         customer_email="test@example.com",
         refund_amount=69.00,
@@ -22,10 +22,10 @@ if slack_service.enabled:
         refund_id="re_test123456",
         channel="#refunds"
     )
-    print(f"   Result: {'✅ Success' if result else '❌ Failed'}")
+    print(f"   Result: {'✅ Queued' if queued else '❌ Not queued'}")
     
     print("\n2. Testing high-value refund alert...")
-    result = slack_service.send_high_value_refund_alert(
+    queued = slack_service.send_high_value_refund_alert(
         order_id="ORD9999",
         customer_email="vip@example.com",
         refund_amount=250.00,
@@ -33,10 +33,10 @@ if slack_service.enabled:
         ticket_id="TKT-123",
         channel="#high-value-refunds"
     )
-    print(f"   Result: {'✅ Success' if result else '❌ Failed'}")
+    print(f"   Result: {'✅ Queued' if queued else '❌ Not queued'}")
     
     print("\n3. Testing support ticket notification...")
-    result = slack_service.send_support_ticket_notification(
+    queued = slack_service.send_support_ticket_notification(
         ticket_id="TKT-456",
         issue="Customer needs help with account",
         customer_email="support@example.com",
@@ -44,7 +44,11 @@ if slack_service.enabled:
         priority="high",
         channel="#support-tickets"
     )
-    print(f"   Result: {'✅ Success' if result else '❌ Failed'}")
+    print(f"   Result: {'✅ Queued' if queued else '❌ Not queued'}")
+    
+    # Posts are sent in the background; wait for them so delivery errors are logged
+    print("\nWaiting for queued posts to be delivered...")
+    slack_service.close()
 else:
     print("\n⚠️  Slack service is not enabled. Check your SLACK_TOKEN in .env")
 